@@ -0,0 +1,90 @@
+# bench/conformance.py
+# Check that every parser yields identical transactions under each
+# extraction engine before switching a bank over via EXTRACT_ENGINE_BANKS.
+#
+#   python -m bench.conformance                       # synthetic statements, all banks
+#   python -m bench.conformance --pages 1 5 60 --encrypt
+#   python -m bench.conformance --pdf statement.pdf --bank rakbank --password secret
+import argparse
+import sys
+
+from bench.synth import LAYOUTS, make_statement
+from common.engines import ENGINES
+
+PASSWORD = "bench"
+
+
+def parse_with(engine: str, source, bank: str, password: str | None = None) -> dict:
+    from common.document import open_statement
+    from parsers import get_iterator
+
+    doc = open_statement(source, password)
+    if isinstance(doc, dict):
+        raise RuntimeError(doc["error"])
+    with doc:
+        doc.use_engine(engine)
+        if doc.engine != engine:
+            raise RuntimeError(f"{engine} could not open the document")
+        meta = {}
+        transactions = list(get_iterator(bank)(doc, meta))
+    return {"transactions": transactions, "from_date": meta.get("from_date"), "to_date": meta.get("to_date")}
+
+
+def first_difference(expected: dict, actual: dict) -> str | None:
+    for key in ("from_date", "to_date"):
+        if expected[key] != actual[key]:
+            return f"{key}: {expected[key]!r} != {actual[key]!r}"
+    a, b = expected["transactions"], actual["transactions"]
+    for index, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return f"transaction {index}: {x!r} != {y!r}"
+    if len(a) != len(b):
+        return f"{len(a)} transactions != {len(b)}"
+    return None
+
+
+def check(label: str, source, bank: str, password: str | None, engines) -> bool:
+    reference = parse_with(engines[0], source, bank, password)
+    ok = True
+    for engine in engines[1:]:
+        diff = first_difference(reference, parse_with(engine, source, bank, password))
+        status = "ok" if diff is None else f"MISMATCH {diff}"
+        print(f"{label:<32} {engines[0]} vs {engine:<12}{len(reference['transactions']):>6} tx  {status}")
+        ok = ok and diff is None
+    return ok
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Compare parser output across extraction engines")
+    ap.add_argument("--banks", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    ap.add_argument("--pages", nargs="+", type=int, default=[1, 5, 30])
+    ap.add_argument("--encrypt", action="store_true", help="also check password-protected variants")
+    ap.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES),
+                    help="the first engine is the reference")
+    ap.add_argument("--pdf", nargs="+", help="check real statements instead of synthetic ones")
+    ap.add_argument("--bank", help="parser to use for --pdf (default: detected)")
+    ap.add_argument("--password")
+    args = ap.parse_args(argv)
+    if len(args.engines) < 2:
+        ap.error("need at least two engines to compare")
+
+    ok = True
+    if args.pdf:
+        from common.bank_detect import detect_bank
+
+        for path in args.pdf:
+            bank = args.bank or detect_bank(path, args.password) or "unknown"
+            ok &= check(f"{path} ({bank})", path, bank, args.password, args.engines)
+    else:
+        for bank in args.banks:
+            for pages in args.pages:
+                for encrypted in ([False, True] if args.encrypt else [False]):
+                    password = PASSWORD if encrypted else None
+                    data = make_statement(bank, pages, password=password)
+                    label = f"{bank}/{pages}p{'/enc' if encrypted else ''}"
+                    ok &= check(label, data, bank, password, args.engines)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# bench/run.py
+# Parser benchmark over synthetic statements.
+#
+#   python -m bench.run                          # all banks, 5 and 50 pages
+#   python -m bench.run --banks enbd --pages 100 --encrypt
+#   python -m bench.run --save                   # write bench/baseline.json
+#   python -m bench.run --compare                # diff against the saved baseline
+#   python -m bench.run --engine pdfium          # time another extraction engine
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench.synth import LAYOUTS, make_statement
+from common.engines import ENGINES
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+STAGES = ("open", "extract", "regex", "normalize")
+PASSWORD = "bench"
+
+
+def _case_id(bank: str, pages: int, encrypted: bool, engine: str = "pdfplumber") -> str:
+    engine_suffix = "" if engine == "pdfplumber" else f"/{engine}"
+    return f"{bank}/{pages}p{'/enc' if encrypted else ''}{engine_suffix}"
+
+
+def measure_case(bank: str, pages: int, encrypted: bool, repeat: int, engine: str = "pdfplumber") -> dict:
+    """Run one case `repeat` times in this process and return median stage timings."""
+    from common.document import open_statement
+    from common.layouts import layout_for
+    from common.pdf_utils import summarize_transactions
+    from common.transactions import TransactionBatch
+    from parsers import get_iterator
+
+    password = PASSWORD if encrypted else None
+    data = make_statement(bank, pages, password=password)
+    iterate = get_iterator(bank)
+    runs = {stage: [] for stage in STAGES}
+    tx_count = 0
+
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        doc = open_statement(data, password)
+        if isinstance(doc, dict):
+            raise RuntimeError(doc["error"])
+        doc.use_engine(engine)
+        doc.use_layout(layout_for(bank))  # parsers do this too; time it with the open
+        t1 = time.perf_counter()
+        with doc:
+            doc.prefetch()
+            for index in range(doc.page_count):
+                doc.page_text(index)
+            t2 = time.perf_counter()
+            meta = {}
+            transactions = list(iterate(doc, meta))
+            t3 = time.perf_counter()
+        summarize_transactions(TransactionBatch(meta["bank"], meta["card_type"]).extend(transactions))
+        t4 = time.perf_counter()
+
+        for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            runs[stage].append(seconds)
+        tx_count = len(transactions)
+
+    stages = {stage: statistics.median(values) for stage, values in runs.items()}
+    total = sum(stages.values())
+    return {
+        "case": _case_id(bank, pages, encrypted, engine),
+        "bank": bank,
+        "engine": engine,
+        "pages": pages,
+        "encrypted": encrypted,
+        "bytes": len(data),
+        "transactions": tx_count,
+        "seconds": total,
+        "pages_per_sec": pages / total if total else 0.0,
+        "tx_per_sec": tx_count / total if total else 0.0,
+        "stages": stages,
+        # KiB on Linux, bytes on macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_isolated(bank: str, pages: int, encrypted: bool, repeat: int, engine: str = "pdfplumber") -> dict:
+    # a fresh interpreter per case so peak RSS isn't inherited from earlier cases
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(measure_case, bank, pages, encrypted, repeat, engine).result()
+
+
+def print_report(results: list[dict], baseline: dict | None = None):
+    header = f"{'case':<28}{'tx':>7}{'pages/s':>10}{'tx/s':>10}{'rss MB':>9}  " + "  ".join(
+        f"{s:>9}" for s in STAGES
+    )
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+    for r in results:
+        line = (
+            f"{r['case']:<28}{r['transactions']:>7}{r['pages_per_sec']:>10.1f}{r['tx_per_sec']:>10.0f}"
+            f"{r['peak_rss_kb'] / 1024:>9.1f}  "
+            + "  ".join(f"{r['stages'][s] * 1000:>7.1f}ms" for s in STAGES)
+        )
+        if baseline:
+            base = baseline.get(r["case"])
+            if base and base["pages_per_sec"]:
+                change = r["pages_per_sec"] / base["pages_per_sec"] - 1
+                line += f"{change * 100:>+9.1f}%"
+            else:
+                line += f"{'n/a':>10}"
+        print(line)
+
+
+def regressions(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    slow = []
+    for r in results:
+        base = baseline.get(r["case"])
+        if base and base["pages_per_sec"] and r["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance):
+            slow.append(r["case"])
+    return slow
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark statement parsers on synthetic PDFs")
+    ap.add_argument("--banks", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    ap.add_argument("--pages", nargs="+", type=int, default=[5, 50])
+    ap.add_argument("--encrypt", action="store_true", help="also run password-protected variants")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--engine", default="pdfplumber", choices=list(ENGINES), help="text extraction engine")
+    ap.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="write results as the baseline")
+    ap.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="compare against a baseline")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed pages/sec drop before failing")
+    ap.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = ap.parse_args(argv)
+
+    results = []
+    for bank in args.banks:
+        for pages in args.pages:
+            for encrypted in ([False, True] if args.encrypt else [False]):
+                results.append(run_isolated(bank, pages, encrypted, args.repeat, args.engine))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)["cases"]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({
+                "python": sys.version.split()[0],
+                "machine": platform.machine(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "cases": {r["case"]: r for r in results},
+            }, fh, indent=2)
+        print(f"baseline written to {args.save}")
+
+    if baseline:
+        slow = regressions(results, baseline, args.tolerance)
+        if slow:
+            print(f"REGRESSION (> {args.tolerance:.0%} slower): {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
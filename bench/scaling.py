@@ -0,0 +1,78 @@
+# bench/scaling.py
+# Parser scaling benchmark: time spent in a bank's iter_<bank> per page as
+# the statement grows. Page text is extracted once up front (pdfium by
+# default) so only the parser is timed. Fails when the per-page cost at the
+# largest size exceeds the smallest size's by more than the tolerance.
+#
+#   python -m bench.scaling                        # enbd, 10/100/300 pages
+#   python -m bench.scaling --pages 30 300 --tolerance 0.5
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from bench.synth import LAYOUTS, make_statement
+from common.engines import ENGINES
+
+
+def measure(bank: str, pages: int, repeat: int, engine: str) -> dict:
+    from common.document import open_statement
+    from parsers import get_iterator
+
+    doc = open_statement(make_statement(bank, pages), None)
+    if isinstance(doc, dict):
+        raise RuntimeError(doc["error"])
+    doc.use_engine(engine)
+    iterate = get_iterator(bank)
+    runs = []
+    tx_count = 0
+    with doc:
+        for _ in doc.iter_page_texts():  # memoized from here on
+            pass
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            tx_count = sum(1 for _ in iterate(doc, {}))
+            runs.append(time.perf_counter() - t0)
+
+    seconds = statistics.median(runs)
+    return {
+        "pages": pages,
+        "transactions": tx_count,
+        "seconds": seconds,
+        "us_per_page": seconds / pages * 1e6,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Check that a parser scales linearly with page count")
+    ap.add_argument("--bank", default="enbd", choices=list(LAYOUTS))
+    ap.add_argument("--pages", nargs="+", type=int, default=[10, 100, 300])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--engine", default="pdfium", choices=list(ENGINES), help="engine for the one-off extraction")
+    ap.add_argument("--tolerance", type=float, default=0.5,
+                    help="allowed per-page slowdown of the largest size over the smallest")
+    ap.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = ap.parse_args(argv)
+
+    sizes = sorted(set(args.pages))
+    results = [measure(args.bank, pages, args.repeat, args.engine) for pages in sizes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'pages':>7}{'tx':>9}{'ms':>10}{'us/page':>10}")
+        for r in results:
+            print(f"{r['pages']:>7}{r['transactions']:>9}{r['seconds'] * 1000:>10.1f}{r['us_per_page']:>10.1f}")
+
+    first, last = results[0], results[-1]
+    ratio = last["us_per_page"] / first["us_per_page"] if first["us_per_page"] else 0.0
+    print(f"per-page cost {last['pages']}p vs {first['pages']}p: {ratio:.2f}x (limit {1 + args.tolerance:.2f}x)")
+    if ratio > 1 + args.tolerance:
+        print(f"FAIL: {args.bank} parser does not scale linearly")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
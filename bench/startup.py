@@ -0,0 +1,89 @@
+# bench/startup.py
+# Cold-start benchmark: fresh interpreter -> `import main` -> lifespan startup done.
+# Fails when the median exceeds the budget or a deferred heavy library got
+# imported during start-up.
+#
+#   python -m bench.startup                  # 5 runs, 1.0 s budget
+#   python -m bench.startup --budget 0.6 --repeat 10
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = float(os.environ.get("STARTUP_BUDGET_SECONDS", "1.0"))
+# only needed once a request actually parses, previews or exports something
+DEFERRED = ("pandas", "numpy", "pyarrow", "openpyxl", "pdfplumber", "pdfminer", "pypdfium2")
+
+_PROBE = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def ready():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+t2 = asyncio.run(ready())
+print(json.dumps({
+    "import": t1 - t0,
+    "ready": t2 - t0,
+    "loaded": [m for m in json.loads(sys.argv[1]) if m in sys.modules],
+    "parsers": sorted(m for m in sys.modules if m.startswith("parsers.")),
+}))
+"""
+
+
+def probe() -> dict:
+    with tempfile.TemporaryDirectory() as jobs_dir:
+        env = {**os.environ, "JOBS_DIR": jobs_dir, "PYTHONDONTWRITEBYTECODE": "1"}
+        started = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, json.dumps(DEFERRED)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        wall = time.perf_counter() - started
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process"] = wall
+    return result
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Measure import-to-ready time of the API")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="max median import-to-ready seconds")
+    ap.add_argument("--json", action="store_true", help="print raw runs as JSON")
+    args = ap.parse_args(argv)
+
+    runs = [probe() for _ in range(args.repeat)]
+    ready = statistics.median(r["ready"] for r in runs)
+    imported = statistics.median(r["import"] for r in runs)
+    process = statistics.median(r["process"] for r in runs)
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+    parsers = sorted({m for r in runs for m in r["parsers"]})
+
+    if args.json:
+        print(json.dumps(runs, indent=2))
+    else:
+        print(f"import main     {imported * 1000:8.1f} ms")
+        print(f"import-to-ready {ready * 1000:8.1f} ms  (budget {args.budget * 1000:.0f} ms)")
+        print(f"process total   {process * 1000:8.1f} ms  (interpreter start + exit included)")
+        print(f"parser modules  {', '.join(parsers) or 'none (lazy)'}")
+
+    failed = False
+    if ready > args.budget:
+        print(f"FAIL: import-to-ready {ready:.3f}s exceeds budget {args.budget:.3f}s")
+        failed = True
+    if loaded:
+        print(f"FAIL: heavy modules imported at start-up: {', '.join(loaded)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
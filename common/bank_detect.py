@@ -1,4 +1,6 @@
-from common.pdf_utils import open_pdf_safe
+import re
+from common.document import open_statement
+from common.metrics import stage
 
 BANK_KEYWORDS = {
     "mashreq": ["mashreq", "mashreqbank"],
@@ -9,18 +11,72 @@ BANK_KEYWORDS = {
     # add more banks as needed
 }
 
-def detect_bank(file_path: str, password: str | None = None) -> str | None:
-    pdf = open_pdf_safe(file_path, password)
-    if isinstance(pdf, dict) and "error" in pdf:
-        return None  # can't detect if password is wrong or file is invalid
-
-    with pdf:
-        # Check first 2 pages (some banks show logos/headers differently)
-        pages_to_check = pdf.pages[:2] if len(pdf.pages) >= 2 else pdf.pages
-        for page in pages_to_check:
-            text = (page.extract_text() or "").lower()
-            for bank, keywords in BANK_KEYWORDS.items():
-                if any(kw in text for kw in keywords):
-                    return bank
-
-    return None
+# top share of page 1 that holds logos/letterheads
+HEADER_FRACTION = 0.25
+
+# how much we trust a match from each source, before ambiguity is factored in
+CONFIDENCE = {"metadata": 0.95, "header": 0.9, "pages": 0.75}
+
+_KEYWORD_BANK = {kw: bank for bank, keywords in BANK_KEYWORDS.items() for kw in keywords}
+# one alternation for every keyword; longest first so "mashreqbank" beats "mashreq"
+_KEYWORD_RE = re.compile(
+    "|".join(re.escape(kw) for kw in sorted(_KEYWORD_BANK, key=len, reverse=True)),
+    re.IGNORECASE,
+)
+
+
+def match_banks(text: str) -> tuple[str, float] | None:
+    """
+    Single pass over `text` counting keyword hits per bank.
+    Returns (bank, share of all hits) for the most-mentioned bank, ties going
+    to whichever appears first, or None when no keyword matches.
+    """
+    hits: dict[str, list] = {}
+    for m in _KEYWORD_RE.finditer(text):
+        bank = _KEYWORD_BANK[m.group(0).lower()]
+        entry = hits.get(bank)
+        if entry is None:
+            hits[bank] = [1, m.start()]
+        else:
+            entry[0] += 1
+    if not hits:
+        return None
+    bank, (count, _) = min(hits.items(), key=lambda kv: (-kv[1][0], kv[1][1]))
+    return bank, count / sum(c for c, _ in hits.values())
+
+
+def _metadata_text(doc) -> str:
+    meta = getattr(doc.pdf, "metadata", None) or {}
+    values = (meta.get(k) for k in ("Producer", "Creator", "Title", "Author", "Subject"))
+    return " ".join(v for v in values if isinstance(v, str))
+
+
+def detect_bank_details(source, password: str | None = None) -> dict:
+    """
+    Detect the issuing bank, cheapest evidence first: PDF metadata, then the
+    cropped header of page 1, then the full text of the first two pages
+    (memoized, so the parser reuses it). Returns {"bank", "confidence", "method"}.
+    """
+    doc = open_statement(source, password)
+    if isinstance(doc, dict) and "error" in doc:
+        # can't detect if password is wrong or file is invalid
+        return {"bank": None, "confidence": 0.0, "method": "none"}
+
+    with doc, stage("detect"):
+        candidates = (
+            ("metadata", lambda: _metadata_text(doc)),
+            ("header", lambda: doc.header_text(HEADER_FRACTION)),
+            # some banks show logos/headers differently; check the first 2 pages
+            ("pages", lambda: "\n".join(doc.page_text(i) for i in range(min(2, doc.page_count)))),
+        )
+        for method, get_text in candidates:
+            found = match_banks(get_text())
+            if found:
+                bank, share = found
+                return {"bank": bank, "confidence": round(CONFIDENCE[method] * share, 3), "method": method}
+
+    return {"bank": None, "confidence": 0.0, "method": "none"}
+
+
+def detect_bank(source, password: str | None = None) -> str | None:
+    return detect_bank_details(source, password)["bank"]
@@ -0,0 +1,111 @@
+import hashlib
+import io
+import json
+import os
+import zipfile
+import zlib
+
+from common.uploads import MAX_REQUEST_BYTES, MAX_UPLOAD_BYTES, BufferedUpload, UploadTooLarge
+
+# statements parsed at the same time within one batch request
+BATCH_PARALLELISM = int(os.environ.get("BATCH_PARALLELISM", "2"))
+# upper bound on statements per batch (after zip expansion)
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", "24"))
+# request body cap for /parse/batch, which carries several uploads at once
+BATCH_MAX_REQUEST_BYTES = int(os.environ.get("BATCH_MAX_REQUEST_BYTES", str(4 * MAX_REQUEST_BYTES)))
+# upper bound on what the PDFs of one zip may decompress to, all together
+BATCH_MAX_UNZIPPED_BYTES = int(os.environ.get("BATCH_MAX_UNZIPPED_BYTES", str(100 * 1024 * 1024)))
+
+# what reading a single member can fail with: an unsupported compression
+# method (NotImplementedError), encryption zipfile spots late (RuntimeError),
+# or corrupt data
+_MEMBER_ERRORS = (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error, EOFError, UploadTooLarge)
+
+
+class TooManyFiles(Exception):
+    """Raised when a batch holds more than BATCH_MAX_FILES statements."""
+
+
+def parse_batch_options(raw: str | None) -> dict:
+    """
+    Per-file options as a JSON object keyed by filename (or zip member name):
+    {"jan.pdf": {"password": "...", "bank": "enbd"}}
+    """
+    if not raw:
+        return {}
+    options = json.loads(raw)
+    if not isinstance(options, dict) or not all(isinstance(v, dict) for v in options.values()):
+        raise ValueError("options must be a JSON object of {filename: {password, bank}}")
+    return options
+
+
+def is_zip(filename: str | None, upload: BufferedUpload) -> bool:
+    if filename and filename.lower().endswith(".zip"):
+        return True
+    if upload.data is not None:
+        return upload.data[:4] == b"PK\x03\x04"
+    with open(upload.path, "rb") as fh:
+        return fh.read(4) == b"PK\x03\x04"
+
+
+def expand_zip(upload: BufferedUpload, max_files: int = BATCH_MAX_FILES,
+               max_member_bytes: int = MAX_UPLOAD_BYTES, max_total_bytes: int = BATCH_MAX_UNZIPPED_BYTES):
+    """
+    Yield (member name, BufferedUpload, None) for every PDF inside a zip
+    upload, or (member name, None, error) for one that can't be read, so a
+    single bad member fails on its own. The member count and declared total
+    size are checked before anything is decompressed: more than `max_files`
+    PDFs raises TooManyFiles, more than `max_total_bytes` UploadTooLarge.
+    """
+    source = io.BytesIO(upload.data) if upload.data is not None else upload.path
+    with zipfile.ZipFile(source) as zf:
+        members = [i for i in zf.infolist() if not i.is_dir() and i.filename.lower().endswith(".pdf")]
+        if len(members) > max_files:
+            raise TooManyFiles(f"Batch exceeds {max_files} files")
+        if sum(i.file_size for i in members) > max_total_bytes:
+            raise UploadTooLarge(f"Zip contents exceed {max_total_bytes} bytes")
+
+        total = 0
+        for info in members:
+            if info.flag_bits & 0x1:
+                yield info.filename, None, f"{info.filename} is encrypted; password-protected zips are not supported"
+                continue
+            try:
+                if info.file_size > max_member_bytes:
+                    raise UploadTooLarge(f"{info.filename} exceeds {max_member_bytes} bytes")
+                with zf.open(info) as fh:
+                    # don't trust the header: cap what is actually decompressed
+                    data = fh.read(max_member_bytes + 1)
+                if len(data) > max_member_bytes:
+                    raise UploadTooLarge(f"{info.filename} exceeds {max_member_bytes} bytes")
+            except _MEMBER_ERRORS as e:
+                yield info.filename, None, str(e)
+                continue
+            total += len(data)
+            if total > max_total_bytes:
+                raise UploadTooLarge(f"Zip contents exceed {max_total_bytes} bytes")
+            member = BufferedUpload()
+            member.data = data
+            member.size = len(data)
+            member.sha256 = hashlib.sha256(data).hexdigest()
+            yield info.filename, member, None
+
+
+def combine_summaries(files: list[dict]) -> dict:
+    """Roll per-file summaries of a batch into one."""
+    ok = [f["result"] for f in files if f.get("status") == "ok"]
+    total_debit = sum(r["summary"]["total_debit"] for r in ok)
+    total_credit = sum(r["summary"]["total_credit"] for r in ok)
+    from_dates = [r["from_date"] for r in ok if r.get("from_date")]
+    to_dates = [r["to_date"] for r in ok if r.get("to_date")]
+    return {
+        "file_count": len(files),
+        "succeeded": len(ok),
+        "failed": len(files) - len(ok),
+        "record_count": sum(r["summary"]["record_count"] for r in ok),
+        "total_debit": total_debit,
+        "total_credit": total_credit,
+        "net_change": total_credit - total_debit,
+        "from_date": min(from_dates) if from_dates else None,
+        "to_date": max(to_dates) if to_dates else None,
+    }
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from common.transactions import dumps
+
+# in-memory tier: entry count and (approximate) encoded size bounds
+CACHE_MAX_ENTRIES = int(os.environ.get("PARSE_CACHE_SIZE", "128"))
+CACHE_MAX_BYTES = int(os.environ.get("PARSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# on-disk tier is disabled unless a directory is configured
+CACHE_DIR = os.environ.get("PARSE_CACHE_DIR") or None
+CACHE_DISK_MAX_ENTRIES = int(os.environ.get("PARSE_CACHE_DISK_ENTRIES", "2000"))
+
+# encoded size of a result, estimated from its row count (measured at
+# 140-185 bytes per transaction) instead of encoding it just to measure
+_ROW_BYTES = 192
+_RESULT_BYTES = 512
+
+
+def make_key(content_hash: str, bank: str | None, password: str | None, version: str) -> str:
+    """
+    Cache key for a parse request. The password is part of the key so a cached
+    result is never served to someone who could not have decrypted the file.
+    """
+    h = hashlib.sha256()
+    for part in (content_hash, (bank or "").lower(), password or "", version):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _estimate_size(result: dict) -> int:
+    transactions = result.get("transactions")
+    return _RESULT_BYTES + _ROW_BYTES * (len(transactions) if transactions is not None else 0)
+
+
+class ParseCache:
+    """
+    Two-tier LRU cache for parse results keyed by content hash.
+    Entries on disk live under <dir>/<version digest>/, so bumping a parser
+    version orphans (and removes) the previous generation automatically.
+    With the disk tier on, get() and put() do file I/O (and put() encodes):
+    call them off the event loop then.
+    """
+
+    def __init__(self, version: str, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES, directory: str | None = CACHE_DIR,
+                 disk_max_entries: int = CACHE_DISK_MAX_ENTRIES):
+        self.version = version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_entries = disk_max_entries
+        self._entries: OrderedDict[str, tuple[dict, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+        self.directory = None
+        if directory:
+            digest = hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+            self.directory = os.path.join(directory, digest)
+            os.makedirs(self.directory, exist_ok=True)
+            self._drop_stale_generations(directory, digest)
+
+    # ---------- public API ----------
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[0]
+
+        found = self._disk_get(key)
+        with self._lock:
+            if found is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+        result, size = found
+        self._memory_put(key, result, size)
+        return result
+
+    def put(self, key: str, result: dict):
+        self._memory_put(key, result, _estimate_size(result))
+        if self.directory:
+            self._disk_put(key, dumps(result))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk": self.directory is not None,
+                "version": self.version,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+
+    # ---------- memory tier ----------
+
+    def _memory_put(self, key: str, result: dict, size: int):
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.counters["evictions"] += 1
+
+    # ---------- disk tier ----------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _disk_get(self, key: str) -> tuple[dict, int] | None:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                blob = fh.read()
+            result = json.loads(blob)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mtime doubles as LRU clock for disk eviction
+        except OSError:
+            pass
+        return result, len(blob)
+
+    def _disk_put(self, key: str, encoded: bytes):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                fh.write(encoded)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+        self._disk_evict()
+
+    def _disk_evict(self):
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+        except OSError:
+            return
+        overflow = len(entries) - self.disk_max_entries
+        if overflow <= 0:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries[:overflow]:
+            try:
+                os.unlink(e.path)
+                with self._lock:
+                    self.counters["disk_evictions"] += 1
+            except OSError:
+                pass
+
+    @staticmethod
+    def _drop_stale_generations(root: str, current: str):
+        try:
+            for e in os.scandir(root):
+                if (e.is_dir() and e.name != current and len(e.name) == len(current)
+                        and all(c in "0123456789abcdef" for c in e.name)):
+                    shutil.rmtree(e.path, ignore_errors=True)
+        except OSError:
+            pass
@@ -0,0 +1,185 @@
+import calendar
+import re
+from datetime import date
+from functools import lru_cache
+
+from common.metrics import stage
+
+# Formats tried, in order, when a parser doesn't know its date format.
+FALLBACK_FORMATS = (
+    "%d/%m/%Y",
+    "%d/%m/%y",
+    "%d/%m",
+    "%d %b %Y",
+    "%d %b",
+    "%d%b%y",
+    "%d%b%Y",
+)
+
+_MONTHS = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+_MONTH_NAMES = (
+    "JANUARY", "FEBRUARY", "MARCH", "APRIL", "MAY", "JUNE",
+    "JULY", "AUGUST", "SEPTEMBER", "OCTOBER", "NOVEMBER", "DECEMBER",
+)
+_MONTH_INDEX = {abbr: i for i, abbr in enumerate(_MONTHS, start=1)}
+
+# the subset of strptime directives statements use, with strptime's own
+# patterns, so a format matches exactly what datetime.strptime would accept
+_DIRECTIVES = {
+    "d": r"(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])",
+    "m": r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+    "y": r"(?P<y>\d\d)",
+    "Y": r"(?P<Y>\d\d\d\d)",
+    "b": "(?P<b>" + "|".join(_MONTHS) + ")",
+    "B": "(?P<B>" + "|".join(_MONTH_NAMES) + ")",
+}
+
+
+def clean_date(raw: str) -> str:
+    return raw.strip().upper().replace(".", "").replace(",", "")
+
+
+class DateFormat:
+    """A strptime-style format compiled to one regex; parse() never raises."""
+
+    __slots__ = ("fmt", "regex")
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        parts = []
+        for token in re.split(r"(%.|\s+)", fmt):
+            if not token:
+                continue
+            if token.startswith("%"):
+                parts.append(_DIRECTIVES[token[1]])
+            elif token.isspace():
+                parts.append(r"\s+")
+            else:
+                parts.append(re.escape(token))
+        self.regex = re.compile("".join(parts), re.IGNORECASE)
+
+    def parse(self, text: str) -> tuple[int | None, int, int] | None:
+        """(year or None, month, day) for a cleaned date string, or None."""
+        m = self.regex.fullmatch(text)
+        if m is None:
+            return None
+        groups = m.groupdict()
+        if groups.get("m"):
+            month = int(groups["m"])
+        else:
+            month = _MONTH_INDEX[(groups.get("b") or groups["B"])[:3].upper()]
+        year = None
+        if groups.get("Y"):
+            year = int(groups["Y"])
+        elif groups.get("y"):
+            short = int(groups["y"])
+            year = 2000 + short if short < 69 else 1900 + short  # strptime's pivot
+        day = int(groups["d"])
+        if year == 0:
+            return None
+        # yearless dates are checked against a leap year; 29 Feb is settled once the year is known
+        if day > calendar.monthrange(year or 2000, month)[1]:
+            return None
+        return year, month, day
+
+
+@lru_cache(maxsize=None)
+def get_format(fmt: str) -> DateFormat:
+    return DateFormat(fmt)
+
+
+def rollover_year(month: int, statement_from: str | None, statement_to: str | None) -> int | None:
+    """
+    Year for a yearless transaction date given the statement period (ISO
+    strings). Statements ending in the first half of the year that show
+    second-half months started in the previous year (Dec rows on a Jan statement).
+    """
+    if not (statement_from and statement_to):
+        return None
+    if int(statement_to[5:7]) < 6 and month > 6:
+        return int(statement_from[:4])
+    return int(statement_to[:4])
+
+
+def to_iso(year: int, month: int, day: int) -> str:
+    if day > calendar.monthrange(year, month)[1]:
+        return ""
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+class DateResolver:
+    """
+    Date conversion for one document.
+    Candidate formats are tried in order until one matches; that format is
+    then tried first for every later date, so the document's format is
+    inferred from the first date seen and the rest skip the cascade.
+    Results are memoized per raw string. Yearless dates take their year from
+    the statement period (set_period), or the current year until it is known.
+    """
+
+    def __init__(self, *formats: str):
+        self.formats = [get_format(f) for f in (formats or FALLBACK_FORMATS)]
+        self.statement_from: str | None = None
+        self.statement_to: str | None = None
+        self._current_year = date.today().year
+        self._memo: dict[str, str] = {}
+
+    def set_period(self, statement_from: str | None, statement_to: str | None):
+        if (statement_from, statement_to) != (self.statement_from, self.statement_to):
+            self.statement_from = statement_from
+            self.statement_to = statement_to
+            self._memo.clear()  # yearless results depend on the period
+
+    def iso(self, raw: str) -> str:
+        """ISO YYYY-MM-DD for `raw`, or '' when no candidate format matches."""
+        result = self._memo.get(raw)
+        if result is None:
+            with stage("dates"):
+                result = self._resolve(raw)
+            self._memo[raw] = result
+        return result
+
+    def _resolve(self, raw: str) -> str:
+        if not raw:
+            return ""
+        text = clean_date(raw)
+        formats = self.formats
+        for i, fmt in enumerate(formats):
+            parts = fmt.parse(text)
+            if parts is not None:
+                if i:
+                    formats.insert(0, formats.pop(i))
+                break
+        else:
+            return ""
+        year, month, day = parts
+        if year is None:
+            year = rollover_year(month, self.statement_from, self.statement_to) or self._current_year
+        return to_iso(year, month, day)
+
+
+@lru_cache(maxsize=4096)
+def _match(raw: str, fmt: str | None) -> tuple[int | None, int, int] | None:
+    text = clean_date(raw)
+    for f in ((fmt,) if fmt else FALLBACK_FORMATS):
+        parts = get_format(f).parse(text)
+        if parts is not None:
+            return parts
+    return None
+
+
+def parse_date(raw: str, fmt: str | None = None, year: int | None = None) -> str:
+    """
+    Stateless conversion of one date to ISO (YYYY-MM-DD). With `fmt` only that
+    format is tried, otherwise the fallback formats; '' when nothing matches.
+    Yearless dates get `year`, defaulting to the current year.
+    """
+    if not raw:
+        return ""
+    parts = _match(raw, fmt)
+    if parts is None:
+        return ""
+    y, month, day = parts
+    if y is None:
+        y = year or date.today().year
+    return to_iso(y, month, day)
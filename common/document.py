@@ -0,0 +1,186 @@
+from common.metrics import note, stage
+from common.pdf_utils import open_pdf_safe
+from common.engines import DEFAULT_ENGINE, PdfplumberReader, TextReader, open_reader
+from common.extract import can_reopen, extract_page_texts, should_parallelize
+
+
+class StatementDocument:
+    """
+    A PDF opened (and decrypted) once per request.
+    Page text is extracted lazily and memoized, so bank detection and the
+    parser share the same layout work. Nested `with doc:` blocks are
+    reference counted: the PDF is closed when the outermost block exits.
+
+    Page text comes from a pluggable extraction engine (common.engines);
+    pdfplumber is the default and the handle used for metadata and crops.
+    With a layout profile (common.layouts) pages after the first are cropped
+    to the transaction table found on page 1.
+
+    `full_texts` holds uncropped pdfplumber page text, filled by previews and
+    by uncropped pdfplumber extraction alike, so a preview and a parse of the
+    same open document (an upload session) lay each page out once.
+
+    `from_texts` builds one over page text captured before (common.snapshots),
+    with no PDF behind it, so a parser runs on it without any extraction.
+
+    Memoized text is kept per (engine, layout profile): a document parsed
+    again as another bank (an upload session with a bank override) never
+    sees pages extracted or cropped for the previous one.
+    """
+
+    def __init__(self, pdf, source=None, password: str | None = None):
+        self.pdf = pdf
+        self.source = source
+        self.password = password
+        self._memo: dict[tuple[str, str | None], dict[int, str]] = {}
+        self.full_texts: dict[int, str] = {}
+        self._reader = PdfplumberReader(pdf)
+        self._region = None
+        self._layout = None  # name of the profile last asked for, found or not
+        self._refs = 0
+
+    @classmethod
+    def from_texts(cls, texts: list[str]) -> "StatementDocument":
+        doc = cls(None)
+        doc._reader = TextReader(texts)
+        doc._texts.update(enumerate(texts))
+        return doc
+
+    @property
+    def _texts(self) -> dict[int, str]:
+        layout = self._layout if self._region is not None else None
+        return self._memo.setdefault((self._reader.name, layout), {})
+
+    @property
+    def page_count(self) -> int:
+        if self.pdf is None:
+            return len(self._reader.texts)
+        return len(self.pdf.pages)
+
+    @property
+    def engine(self) -> str:
+        return self._reader.name
+
+    def use_engine(self, engine: str):
+        """
+        Extract pages with `engine` from here on; pages memoized with another
+        engine stay with that engine. If the engine can't open this document
+        the current one stays.
+        """
+        if engine == self._reader.name or self.pdf is None:
+            return
+        try:
+            reader = open_reader(engine, self.pdf, self.source, self.password)
+        except Exception:
+            return
+        self._reader.close()
+        self._reader = reader
+        # located with the previous engine's coordinates
+        self._region = None
+        self._layout = None
+        note("engine", engine)
+
+    def use_layout(self, profile):
+        """
+        Crop pages after the first to the table `profile` (a LayoutProfile, or
+        None for whole pages) locates on page 1. A different profile replaces
+        the current crop; each keeps its own memoized pages.
+        """
+        name = profile.name if profile is not None else None
+        if name == self._layout:
+            return
+        self._region = None
+        self._layout = name
+        if profile is None or self.page_count < 2:
+            return
+        with stage("extract"):
+            self._region = self._reader.locate_table(profile)
+        if self._region is not None:
+            note("layout", profile.name)
+
+    def _full_text(self, index: int) -> str | None:
+        # only stands in when it's exactly what would be extracted now
+        if self._reader.name == "pdfplumber" and (index == 0 or self._region is None):
+            return self.full_texts.get(index)
+        return None
+
+    def page_text(self, index: int) -> str:
+        text = self._texts.get(index)
+        if text is None:
+            text = self._full_text(index)
+        if text is None:
+            with stage("extract"):
+                if self._region is not None and index > 0:
+                    text = self._reader.region_text(index, self._region)
+                if text is None:
+                    text = self._reader.page_text(index)
+                    if self._reader.name == "pdfplumber":
+                        self.full_texts[index] = text
+        self._texts[index] = text
+        return text
+
+    def header_text(self, fraction: float) -> str:
+        """
+        Text of the top `fraction` of page 1. Cropping reuses the page's parsed
+        layout objects, so this is much cheaper than a full extraction and
+        doesn't make the later full extraction any more expensive.
+        """
+        if self.page_count == 0:
+            return ""
+        if 0 in self._texts:
+            return self._texts[0]  # already paid for the whole page
+        page = self.pdf.pages[0]
+        x0, top, x1, bottom = page.bbox
+        with stage("extract"):
+            return page.crop((x0, top, x1, top + (bottom - top) * fraction)).extract_text() or ""
+
+    def prefetch(self):
+        """Extract all remaining pages up front, in parallel for long statements."""
+        count = self.page_count
+        if not self._reader.parallel or not should_parallelize(count) or not can_reopen(self.source):
+            return
+        start = 0
+        while start < count and (start in self._texts or self._full_text(start) is not None):
+            start += 1
+        if count - start < 2:
+            return
+        with stage("extract"):
+            texts = extract_page_texts(self.source, self.password, start, count, self._region)
+        for offset, text in enumerate(texts):
+            self._texts.setdefault(start + offset, text)
+
+    def iter_page_texts(self):
+        self.prefetch()
+        for index in range(self.page_count):
+            yield self.page_text(index)
+
+    def close(self):
+        self._reader.close()
+        if self.pdf is not None:
+            self.pdf.close()
+
+    def __enter__(self):
+        self._refs += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._refs -= 1
+        if self._refs <= 0:
+            self.close()
+        return False
+
+
+def open_statement(source, password: str | None = None):
+    """
+    Return a StatementDocument for a path/file-like, or the document itself
+    when one is passed in. Returns an error dict like open_pdf_safe.
+    """
+    if isinstance(source, StatementDocument):
+        return source
+    pdf = open_pdf_safe(source, password)
+    if isinstance(pdf, dict) and "error" in pdf:
+        return pdf
+    doc = StatementDocument(pdf, source, password)
+    doc.use_engine(DEFAULT_ENGINE)
+    note("pages", doc.page_count)
+    return doc
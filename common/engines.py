@@ -0,0 +1,212 @@
+import os
+import re
+import threading
+
+from common.extract import can_reopen
+from common.layouts import cropped_text, find_region, locate_table, region_text
+from common.pdf_utils import release_page
+
+# Text extraction engines. Parsers only ever see page text through
+# StatementDocument, so switching the engine never touches parser code.
+#
+#   pdfplumber  pdfminer char objects + line clustering; the reference output
+#               every parser was written against
+#   pdfium      PDFium's text layer via pypdfium2 (already a pdfplumber
+#               dependency); no char objects or layout analysis, roughly an
+#               order of magnitude faster on single-column statements
+
+DEFAULT_ENGINE = os.environ.get("EXTRACT_ENGINE", "pdfplumber").strip().lower()
+
+
+def _parse_bank_engines(spec: str) -> dict[str, str]:
+    """"enbd=pdfium,rakbank=pdfium" -> {"enbd": "pdfium", "rakbank": "pdfium"}"""
+    engines = {}
+    for item in spec.split(","):
+        bank, sep, engine = item.partition("=")
+        if sep and bank.strip() and engine.strip():
+            engines[bank.strip().lower().replace(" ", "")] = engine.strip().lower()
+    return engines
+
+
+BANK_ENGINES = _parse_bank_engines(os.environ.get("EXTRACT_ENGINE_BANKS", ""))
+
+
+def engine_for(bank: str | None) -> str:
+    return BANK_ENGINES.get((bank or "").lower().replace(" ", ""), DEFAULT_ENGINE)
+
+
+def engine_signature() -> str:
+    """Engine configuration as a stable string, folded into the cache version."""
+    overrides = ",".join(f"{bank}={engine}" for bank, engine in sorted(BANK_ENGINES.items()))
+    return f"engine={DEFAULT_ENGINE}" + (f";{overrides}" if overrides else "")
+
+
+class PdfplumberReader:
+    name = "pdfplumber"
+    # long statements are worth fanning out across processes (common.extract)
+    parallel = True
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+
+    def page_text(self, index: int) -> str:
+        page = self.pdf.pages[index]
+        try:
+            return page.extract_text() or ""
+        finally:
+            release_page(page)
+
+    def locate_table(self, profile):
+        # page 1's layout stays cached: its full text is extracted right after
+        return locate_table(self.pdf.pages[0], profile)
+
+    def region_text(self, index: int, region) -> str | None:
+        page = self.pdf.pages[index]
+        try:
+            return region_text(page, region)
+        finally:
+            release_page(page)
+
+    def close(self):
+        pass  # the pdfplumber handle belongs to the StatementDocument
+
+
+# PDFium keeps global state and is not thread-safe; the thread executor
+# can run several documents at once, so every call goes through this lock
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _normalize_pdfium(text: str) -> str:
+    # match extract_text(): "\n" line breaks, no trailing blanks, no final newline
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+class PdfiumReader:
+    name = "pdfium"
+    parallel = False  # already fast enough that worker start-up would dominate
+
+    def __init__(self, source, password: str | None = None):
+        import pypdfium2
+
+        with _PDFIUM_LOCK:
+            self._pdf = pypdfium2.PdfDocument(source, password=password)
+
+    def page_text(self, index: int) -> str:
+        with _PDFIUM_LOCK:
+            page = self._pdf[index]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+        return _normalize_pdfium(text)
+
+    def _text_in(self, textpage, height: float):
+        # pdfplumber boxes are measured from the top, PDF space from the bottom
+        def text_in(bbox):
+            x0, top, x1, bottom = bbox
+            return _normalize_pdfium(textpage.get_text_bounded(x0, height - bottom, x1, height - top))
+        return text_in
+
+    def locate_table(self, profile):
+        """common.layouts.find_region on page 1 using PDFium's text and char boxes."""
+        with _PDFIUM_LOCK:
+            page = self._pdf[0]
+            textpage = page.get_textpage()
+            try:
+                width, height = page.get_size()
+                text = textpage.get_text_range()
+
+                def search(pattern):
+                    spans = []
+                    for m in re.finditer(pattern, text, re.IGNORECASE):
+                        boxes = [textpage.get_charbox(i) for i in range(m.start(), m.end()) if not text[i].isspace()]
+                        if boxes:
+                            spans.append((height - max(b[3] for b in boxes), height - min(b[1] for b in boxes)))
+                    return spans
+
+                return find_region(profile, (0, 0, width, height), search, self._text_in(textpage, height))
+            finally:
+                textpage.close()
+                page.close()
+
+    def region_text(self, index: int, region) -> str | None:
+        with _PDFIUM_LOCK:
+            page = self._pdf[index]
+            textpage = page.get_textpage()
+            try:
+                width, height = page.get_size()
+                if (0, 0, width, height) != region.page_bbox:
+                    return None
+                return cropped_text(region, self._text_in(textpage, height))
+            finally:
+                textpage.close()
+                page.close()
+
+    def close(self):
+        with _PDFIUM_LOCK:
+            self._pdf.close()
+
+
+class TextReader:
+    """
+    Page text captured earlier (common.snapshots) instead of a PDF: nothing is
+    extracted, and there is no layout left to crop.
+    """
+    name = "text"
+    parallel = False
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+
+    def page_text(self, index: int) -> str:
+        return self.texts[index]
+
+    def locate_table(self, profile):
+        return None
+
+    def region_text(self, index: int, region) -> str | None:
+        return None
+
+    def close(self):
+        pass
+
+
+ENGINES = ("pdfplumber", "pdfium")
+
+
+def count_pages(source, password: str | None = None) -> int | None:
+    """
+    Page count of a path or raw PDF bytes via PDFium, which reads only the
+    page tree, so it is cheap enough to run before admitting a document.
+    None when the file can't be opened (the parse itself reports why).
+    """
+    if not can_reopen(source):
+        return None
+    try:
+        import pypdfium2
+
+        with _PDFIUM_LOCK:
+            pdf = pypdfium2.PdfDocument(source, password=password)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    except Exception:
+        return None
+
+
+def open_reader(engine: str, pdf, source=None, password: str | None = None):
+    """
+    Page reader for `engine`. pdfplumber reuses the already opened `pdf`;
+    other engines reopen `source`, so they need a path or the raw bytes.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown extraction engine: {engine}")
+    if engine == "pdfium":
+        if not can_reopen(source):
+            raise ValueError("pdfium needs a path or the raw PDF bytes")
+        return PdfiumReader(source, password)
+    return PdfplumberReader(pdf)
@@ -0,0 +1,173 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# "process" (default) keeps CPU-bound PDF work off the event loop and the GIL;
+# "thread" is handy for local debugging or platforms where spawning is costly.
+EXECUTOR_KIND = os.environ.get("PARSER_EXECUTOR", "process").strip().lower()
+MAX_WORKERS = int(os.environ.get("PARSER_WORKERS") or os.cpu_count() or 1)
+# jobs allowed to wait for a free worker before new submissions are rejected
+MAX_QUEUE = int(os.environ.get("PARSER_MAX_QUEUE", "16"))
+# recycle workers after this many jobs (pdfminer caches are not always released)
+MAX_JOBS_PER_WORKER = int(os.environ.get("PARSER_MAX_JOBS_PER_WORKER", "50"))
+# chunks a streaming job may get ahead of its reader before it waits
+STREAM_QUEUE_CHUNKS = 16
+_STREAM_POLL_SECONDS = 0.25
+
+
+class ExecutorBusy(Exception):
+    """Raised when the parser queue is full and the job was not accepted."""
+
+
+_pool = None
+_jobs_on_pool = 0
+_in_flight = 0
+_in_worker = False
+_manager = None
+
+
+def _mark_worker():
+    global _in_worker
+    _in_worker = True
+
+
+def in_worker_process() -> bool:
+    """True inside a parser pool process: single-threaded, so it may fork."""
+    return _in_worker
+
+
+def _new_pool():
+    if EXECUTOR_KIND == "thread":
+        return ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="parser")
+    return ProcessPoolExecutor(
+        max_workers=MAX_WORKERS,
+        # the server has threads (threadpool, sessions), so never fork it
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_mark_worker,
+        max_tasks_per_child=MAX_JOBS_PER_WORKER or None,
+    )
+
+
+def _get_pool():
+    global _pool, _jobs_on_pool
+    if _pool is None:
+        _pool = _new_pool()
+        _jobs_on_pool = 0
+    elif (
+        isinstance(_pool, ThreadPoolExecutor)
+        and MAX_JOBS_PER_WORKER
+        and _jobs_on_pool >= MAX_JOBS_PER_WORKER * MAX_WORKERS
+    ):
+        # threads can't be recycled individually: swap the whole pool and let
+        # the old one finish whatever it is still running
+        _pool.shutdown(wait=False)
+        _pool = _new_pool()
+        _jobs_on_pool = 0
+    return _pool
+
+
+def _reset_pool(broken):
+    """Drop `broken`, unless another job already replaced it with a healthy pool."""
+    global _pool
+    if _pool is broken:
+        _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def stats() -> dict:
+    return {
+        "kind": EXECUTOR_KIND,
+        "workers": MAX_WORKERS,
+        "max_queue": MAX_QUEUE,
+        "in_flight": _in_flight,
+        "queued": max(0, _in_flight - MAX_WORKERS),
+    }
+
+
+async def run_job(fn, *args):
+    """
+    Run a synchronous job on the parser pool and await its result.
+    `fn` must be a module-level function when the process pool is used.
+    Raises ExecutorBusy when workers and queue are saturated.
+    """
+    global _in_flight, _jobs_on_pool
+    if _in_flight >= MAX_WORKERS + MAX_QUEUE:
+        raise ExecutorBusy("Parser queue is full, retry shortly")
+
+    pool = _get_pool()
+    _in_flight += 1
+    _jobs_on_pool += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # a worker died (OOM, segfault in a native lib); start fresh next time
+        _reset_pool(pool)
+        raise
+    finally:
+        _in_flight -= 1
+
+
+def _channel():
+    """A bounded queue and a cancel flag that a pool worker can be handed."""
+    global _manager
+    if EXECUTOR_KIND == "thread":
+        return queue.Queue(STREAM_QUEUE_CHUNKS), threading.Event()
+    if _manager is None:
+        _manager = multiprocessing.get_context("spawn").Manager()
+    return _manager.Queue(STREAM_QUEUE_CHUNKS), _manager.Event()
+
+
+async def stream_job(fn, *args):
+    """
+    Run fn(channel, cancel, *args) on the parser pool (as run_job) and yield
+    whatever it puts on `channel` until it puts None. Closing the generator
+    early sets `cancel`, which the worker checks between chunks (see
+    common.streaming.send). A failed job raises once its output is drained.
+    """
+    channel, cancel = _channel()
+    job = asyncio.ensure_future(run_job(fn, channel, cancel, *args))
+    finished = False
+    try:
+        job_done = False
+        while True:
+            try:
+                item = await asyncio.to_thread(channel.get, True, _STREAM_POLL_SECONDS)
+            except queue.Empty:
+                if job_done:
+                    job.result()  # raises what the job failed with
+                    break
+                job_done = job.done()  # one more look for what it put just before returning
+                continue
+            if item is None:
+                break
+            yield item
+        finished = True
+        await job
+    finally:
+        if not finished:
+            cancel.set()
+            job.add_done_callback(_discard_result)
+
+
+def _discard_result(job):
+    if not job.cancelled():
+        job.exception()
+
+
+def start():
+    _get_pool()
+
+
+def shutdown():
+    global _pool, _manager
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+    _pool = None
+    if _manager is not None:
+        _manager.shutdown()
+    _manager = None
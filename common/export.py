@@ -0,0 +1,158 @@
+import csv
+import io
+import os
+import tempfile
+
+from common.transactions import FIELDS, TransactionBatch, iter_values
+
+# rows encoded per chunk handed to the response
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "1000"))
+# bytes read per chunk when streaming a finished xlsx/parquet file back
+_FILE_CHUNK_BYTES = 256 * 1024
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# leading characters spreadsheet apps treat as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class ExportUnavailable(Exception):
+    """The requested format needs an optional dependency that isn't installed."""
+
+
+def check_format(fmt: str) -> str:
+    """Validate `?format=`; raises ValueError or ExportUnavailable."""
+    fmt = fmt.strip().lower()
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unknown format: {fmt}. Available: {', '.join(MEDIA_TYPES)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ExportUnavailable("Parquet export needs pyarrow installed") from None
+    return fmt
+
+
+def _chunks(transactions, fields, offset, limit):
+    chunk = []
+    for values in iter_values(transactions, fields, offset, limit):
+        chunk.append(values)
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _stream_file(write):
+    """Run write(path) into a temp file, then yield the file in chunks and remove it."""
+    fd, path = tempfile.mkstemp(prefix="statement-export-")
+    os.close(fd)
+    try:
+        write(path)
+        with open(path, "rb") as fh:
+            while True:
+                data = fh.read(_FILE_CHUNK_BYTES)
+                if not data:
+                    break
+                yield data
+    finally:
+        os.unlink(path)
+
+
+# ---------- CSV ----------
+
+def _csv_safe(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(result: dict, fields=FIELDS, offset: int = 0, limit: int | None = None):
+    """CSV of the transactions, encoded EXPORT_CHUNK_ROWS rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in _chunks(result.get("transactions", []), fields, offset, limit):
+        writer.writerows([_csv_safe(v) for v in values] for values in chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+# ---------- XLSX ----------
+
+def _write_xlsx(result: dict, fields, offset, limit, path: str):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    # write-only workbooks stream rows to disk instead of keeping cells in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Transactions")
+    ws.append(list(fields))
+    for chunk in _chunks(result.get("transactions", []), fields, offset, limit):
+        for values in chunk:
+            row = list(values)
+            for i, value in enumerate(row):
+                if isinstance(value, str) and value.startswith("="):
+                    # openpyxl would store this as a formula; force a text cell
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.data_type = "s"
+                    row[i] = cell
+            ws.append(row)
+
+    summary = wb.create_sheet("Summary")
+    for key in ("bank", "card_type", "from_date", "to_date"):
+        summary.append([key, result.get(key)])
+    for key, value in (result.get("summary") or {}).items():
+        summary.append([key, value])
+    wb.save(path)
+
+
+def iter_xlsx(result: dict, fields=FIELDS, offset: int = 0, limit: int | None = None):
+    return _stream_file(lambda path: _write_xlsx(result, fields, offset, limit, path))
+
+
+# ---------- Parquet ----------
+
+def _write_parquet(result: dict, fields, offset, limit, path: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"debit": pa.float64(), "credit": pa.float64(), "amount": pa.float64()}
+    schema = pa.schema([(f, types.get(f, pa.string())) for f in fields])
+    transactions = result.get("transactions", [])
+    total = len(transactions)
+    stop = total if limit is None else min(total, offset + limit)
+
+    with pq.ParquetWriter(path, schema) as writer:
+        # one row group per chunk, written column-wise
+        for start in range(offset, stop, EXPORT_CHUNK_ROWS):
+            end = min(stop, start + EXPORT_CHUNK_ROWS)
+            if isinstance(transactions, TransactionBatch):
+                columns = [list(transactions.column(f, start, end)) for f in fields]
+            else:
+                rows = transactions[start:end]
+                columns = [[tx.get(f) for tx in rows] for f in fields]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=schema.field(f).type) for f, col in zip(fields, columns)], schema=schema,
+            ))
+
+
+def iter_parquet(result: dict, fields=FIELDS, offset: int = 0, limit: int | None = None):
+    return _stream_file(lambda path: _write_parquet(result, fields, offset, limit, path))
+
+
+WRITERS = {"csv": iter_csv, "xlsx": iter_xlsx, "parquet": iter_parquet}
+
+
+def export_chunks(result: dict, fmt: str, fields=FIELDS, offset: int = 0, limit: int | None = None):
+    """Byte chunks of `result`'s transactions in `fmt` (already validated by check_format)."""
+    return WRITERS[fmt](result, fields, offset, limit)
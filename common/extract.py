@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from common.executor import MAX_WORKERS, in_worker_process
+from common.layouts import region_text
+from common.pdf_utils import as_pdf_source, iter_pages
+
+# statements shorter than this are extracted in-process; spinning up workers
+# and re-opening the PDF costs more than it saves on a handful of pages
+PARALLEL_MIN_PAGES = int(os.environ.get("PARALLEL_EXTRACT_MIN_PAGES", "24"))
+# extraction processes across the whole server; every parser worker may run
+# its share at once, so a document gets EXTRACT_WORKERS / PARSER_WORKERS
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS") or os.cpu_count() or 1)
+WORKERS_PER_DOCUMENT = max(1, EXTRACT_WORKERS // MAX_WORKERS)
+# never hand a worker fewer pages than this
+MIN_PAGES_PER_WORKER = 4
+
+
+def _mp_context():
+    # fork is cheap (no re-import of pdfplumber) and only ever happens in a
+    # parser pool process, which has no other threads; workers only reopen
+    # the file and never touch the parent's PDF objects
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+
+
+def can_reopen(source) -> bool:
+    return isinstance(source, (str, bytes, os.PathLike))
+
+
+def should_parallelize(page_count: int) -> bool:
+    # not from the server process: forking it with threads running is unsafe
+    return WORKERS_PER_DOCUMENT > 1 and page_count >= PARALLEL_MIN_PAGES and in_worker_process()
+
+
+def _extract_range(source, password: str | None, start: int, stop: int, region=None) -> list[str]:
+    import pdfplumber
+
+    with pdfplumber.open(as_pdf_source(source), password=password) as pdf:
+        texts = []
+        for index, page in iter_pages(pdf, range(start, stop)):
+            text = region_text(page, region) if region is not None and index > 0 else None
+            if text is None:
+                text = page.extract_text() or ""
+            texts.append(text)
+        return texts
+
+
+def page_ranges(start: int, stop: int, workers: int) -> list[tuple[int, int]]:
+    total = stop - start
+    chunks = max(1, min(workers, total // MIN_PAGES_PER_WORKER))
+    size, extra = divmod(total, chunks)
+    ranges = []
+    for i in range(chunks):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def extract_page_texts(source, password: str | None, start: int, stop: int, region=None) -> list[str]:
+    """
+    Extract text for pages [start, stop) across worker processes, each one
+    reopening `source` (a path or the raw bytes) and handling a contiguous
+    page range. Pages after the first are cropped to `region` (a
+    common.layouts.TableRegion) when given. Returns texts in page order.
+    """
+    ranges = page_ranges(start, stop, WORKERS_PER_DOCUMENT)
+    if len(ranges) == 1:
+        return _extract_range(source, password, start, stop, region)
+
+    with ProcessPoolExecutor(max_workers=len(ranges), mp_context=_mp_context()) as pool:
+        futures = [pool.submit(_extract_range, source, password, a, b, region) for a, b in ranges]
+        texts = []
+        for fut in futures:
+            texts.extend(fut.result())
+    return texts
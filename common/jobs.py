@@ -0,0 +1,242 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from common.transactions import dumps
+
+JOBS_DIR = os.environ.get("JOBS_DIR") or os.path.join(tempfile.gettempdir(), "statement-jobs")
+# finished jobs (and their results) are kept this long for polling clients
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", "3600"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+POLL_SECONDS = 1.0
+CLEANUP_EVERY_SECONDS = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    dedupe_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    input_path TEXT,
+    password TEXT,
+    bank TEXT,
+    flow TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key);
+"""
+
+
+class JobStore:
+    """
+    Local persistent job queue in SQLite. Uploaded PDFs are written next to
+    the database and removed as soon as the job finishes; results are kept
+    until JOB_TTL_SECONDS after that. Passwords are only held in memory, so
+    a queued job for an encrypted PDF fails if the process restarts first.
+    Create it on the event loop; the other methods block (file and SQLite
+    I/O) and may be called from worker threads.
+    """
+
+    def __init__(self, directory: str = JOBS_DIR, ttl: int = JOB_TTL_SECONDS):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "jobs.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._passwords: dict[str, str] = {}
+        self._loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+            columns = {r["name"] for r in self._db.execute("PRAGMA table_info(jobs)")}
+            if "flow" not in columns:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN flow TEXT")
+            # jobs that were running when the process died go back on the queue
+            self._db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            # written by earlier versions, which kept passwords until the job finished
+            self._db.execute("UPDATE jobs SET password = NULL WHERE password IS NOT NULL")
+
+    # ---------- submission / lookup ----------
+
+    def find_reusable(self, dedupe_key: str) -> dict | None:
+        """A queued, running or finished job for the same input, if any."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE dedupe_key = ? AND status != 'failed' "
+                "ORDER BY created_at DESC LIMIT 1",
+                (dedupe_key,),
+            ).fetchone()
+        return self._public(row) if row else None
+
+    def submit(self, dedupe_key: str, source, password: str | None, bank: str | None, flow: str = "") -> dict:
+        job_id = uuid.uuid4().hex
+        path = os.path.join(self.directory, f"{job_id}.pdf")
+        if isinstance(source, (bytes, bytearray)):
+            with open(path, "wb") as fh:
+                fh.write(source)
+        else:
+            with open(source, "rb") as src, open(path, "wb") as dst:
+                while chunk := src.read(1024 * 1024):
+                    dst.write(chunk)
+
+        now = time.time()
+        with self._lock, self._db:
+            if password:
+                self._passwords[job_id] = password
+            self._db.execute(
+                "INSERT INTO jobs (id, dedupe_key, status, input_path, bank, flow, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, dedupe_key, path, bank, flow, now, now),
+            )
+        self._loop.call_soon_threadsafe(self.wakeup.set)
+        return self.get(job_id)
+
+    def submit_finished(self, dedupe_key: str, result: dict) -> dict:
+        """Record a job whose result is already known (e.g. a cache hit)."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO jobs (id, dedupe_key, status, result, created_at, updated_at, finished_at) "
+                "VALUES (?, ?, 'done', ?, ?, ?, ?)",
+                (job_id, dedupe_key, dumps(result).decode("utf-8"), now, now, now),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._public(row) if row else None
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    # ---------- worker side ----------
+
+    def claim_next(self) -> dict | None:
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (time.time(), row["id"]),
+            )
+            job = dict(row)
+            job["password"] = self._passwords.get(row["id"])
+        return job
+
+    def requeue(self, job_id: str):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE id = ?", (time.time(), job_id)
+            )
+
+    def finish(self, job_id: str, result: dict | None = None, error: str | None = None):
+        now = time.time()
+        with self._lock, self._db:
+            self._passwords.pop(job_id, None)
+            row = self._db.execute("SELECT input_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, input_path = NULL, "
+                "updated_at = ?, finished_at = ? WHERE id = ?",
+                (
+                    "failed" if error else "done",
+                    dumps(result).decode("utf-8") if result is not None else None,
+                    error,
+                    now,
+                    now,
+                    job_id,
+                ),
+            )
+        if row and row["input_path"]:
+            _unlink(row["input_path"])
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock, self._db:
+            cur = self._db.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+            )
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _public(row) -> dict:
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["status"] == "done":
+            job["result"] = json.loads(row["result"])
+        elif row["status"] == "failed":
+            job["error"] = row["error"]
+        return job
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def run_worker(store: JobStore, handler):
+    """
+    Pull queued jobs forever and hand them to `handler(job) -> result dict`.
+    `handler` raises to fail a job, or returns a dict with "error".
+    Returning None puts the job back on the queue (e.g. the pool is busy).
+    """
+    while True:
+        job = store.claim_next()
+        if job is None:
+            store.wakeup.clear()
+            try:
+                await asyncio.wait_for(store.wakeup.wait(), timeout=POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            result = await handler(job)
+        except asyncio.CancelledError:
+            store.requeue(job["id"])
+            raise
+        except Exception as e:
+            store.finish(job["id"], error=str(e))
+            continue
+
+        if result is None:
+            store.requeue(job["id"])
+            await asyncio.sleep(POLL_SECONDS)
+        elif isinstance(result, dict) and "error" in result:
+            store.finish(job["id"], error=result["error"])
+        else:
+            store.finish(job["id"], result=result)
+
+
+async def run_cleanup(store: JobStore):
+    while True:
+        store.purge_expired()
+        await asyncio.sleep(CLEANUP_EVERY_SECONDS)
@@ -0,0 +1,164 @@
+import os
+import re
+
+# Per-bank page layouts. A profile names the anchors that bound the
+# transaction table on page 1: the last line of the letterhead repeated on
+# every page, the table's column header and the page footer. Later pages are
+# extracted from that region only, so the letterhead and footer are left out
+# of line building and the parser sees fewer junk lines. Page 1 itself is
+# always read in full since it carries the statement period and balances.
+#
+# Cropping is verified per page: the text cut away above and below the region
+# must be empty or repeat page 1's letterhead/footer (digits ignored, so
+# "Page 2 of 5" matches "Page 1 of 5"); otherwise that page is read in full.
+
+LAYOUT_CROP = os.environ.get("LAYOUT_CROP", "1").strip().lower() in {"1", "true", "yes", "on"}
+
+_DIGITS_RE = re.compile(r"\d+")
+# gap kept between an anchor and the region; pdfplumber crops include chars
+# that merely touch the box, which would pull in the anchor line
+_EDGE = 0.5
+
+
+class LayoutProfile:
+    __slots__ = ("name", "letterhead", "column_header", "footer")
+
+    def __init__(self, name: str, letterhead: str, column_header: str, footer: str | None = None):
+        self.name = name
+        self.letterhead = letterhead
+        self.column_header = column_header
+        self.footer = footer
+
+
+PROFILES = {
+    "rakbank": LayoutProfile(
+        "rakbank",
+        letterhead=r"your credit card statement",
+        column_header=r"transaction\s+date\s+description",
+        footer=r"page\s*\[?\s*\d+\s*(?:of|/)\s*\d+",
+    ),
+    "emiratesislamic": LayoutProfile(
+        "emiratesislamic",
+        letterhead=r"credit card statement",
+        column_header=r"transaction\s+date\s+posting\s+date",
+        footer=r"page\s*\d+\s*(?:of|/)\s*\d+",
+    ),
+}
+
+
+def layout_for(bank: str | None) -> LayoutProfile | None:
+    if not LAYOUT_CROP:
+        return None
+    return PROFILES.get((bank or "").lower().replace(" ", ""))
+
+
+def layout_signature() -> str:
+    """Cropping setup as a stable string, folded into the cache version."""
+    return "crop=" + (",".join(sorted(PROFILES)) if LAYOUT_CROP else "off")
+
+
+def _band_lines(text: str) -> frozenset[str]:
+    return frozenset(_DIGITS_RE.sub("#", ln.strip()) for ln in text.splitlines() if ln.strip())
+
+
+class TableRegion:
+    """
+    The transaction table's box on page 1, in pdfplumber coordinates
+    (x0, top, x1, bottom), plus the text page 1 has above and below it.
+    Plain data so it can be handed to extraction worker processes.
+    """
+
+    __slots__ = ("page_bbox", "bbox", "head", "foot")
+
+    def __init__(self, page_bbox, bbox, head: str, foot: str):
+        self.page_bbox = tuple(page_bbox)
+        self.bbox = tuple(bbox)
+        self.head = _band_lines(head)
+        self.foot = _band_lines(foot)
+
+    def bands(self) -> tuple[tuple, tuple, tuple]:
+        """(above, region, below) boxes: the two cut-away bands and the table itself."""
+        x0, top, x1, bottom = self.page_bbox
+        _, table_top, _, table_bottom = self.bbox
+        return (x0, top, x1, table_top), self.bbox, (x0, table_bottom, x1, bottom)
+
+    def accepts(self, head: str, foot: str) -> bool:
+        """True when nothing but page 1's letterhead/footer would be cut from a page."""
+        return _band_lines(head) <= self.head and _band_lines(foot) <= self.foot
+
+
+def _first(matches, below: float = 0.0):
+    for top, bottom in matches:
+        if top >= below:
+            return top, bottom
+    return None
+
+
+def find_region(profile: LayoutProfile, page_bbox, search, text_in) -> TableRegion | None:
+    """
+    Table region of page 1 from the profile's anchors, or None when the column
+    header isn't there (a different layout). Engine-neutral: `search(pattern)`
+    returns (top, bottom) of each case-insensitive match in reading order and
+    `text_in(bbox)` the text inside a box, both in pdfplumber coordinates.
+    """
+    header = _first(search(profile.column_header))
+    if header is None:
+        return None
+    x0, top, x1, bottom = page_bbox
+    table_top = top
+    letterhead = _first(search(profile.letterhead))
+    if letterhead and letterhead[1] <= header[0]:
+        table_top = letterhead[1] + _EDGE
+    footer = _first(search(profile.footer), below=header[1]) if profile.footer else None
+    table_bottom = footer[0] - _EDGE if footer else bottom
+
+    head = text_in((x0, top, x1, table_top)) if table_top > top else ""
+    foot = text_in((x0, table_bottom, x1, bottom)) if table_bottom < bottom else ""
+    return TableRegion(page_bbox, (x0, table_top, x1, table_bottom), head, foot)
+
+
+def cropped_text(region: TableRegion, text_in) -> str | None:
+    """
+    Text of the table region of a later page via `text_in(bbox)`, or None when
+    the crop would drop anything but page furniture.
+    """
+    above, table, below = region.bands()
+    head = text_in(above) if above[3] > above[1] else ""
+    foot = text_in(below) if below[3] > below[1] else ""
+    if not region.accepts(head, foot):
+        return None
+    return text_in(table)
+
+
+# ---------- pdfplumber pages ----------
+
+def _plumber_text_in(page):
+    # same text as page.crop(bbox).extract_text(), but filters the page's
+    # chars directly instead of building a cropped copy of every object
+    from pdfplumber.utils import extract_text
+
+    chars = page.chars
+
+    def text_in(bbox):
+        x0, top, x1, bottom = bbox
+        inside = [c for c in chars if c["bottom"] > top and c["top"] < bottom and c["x1"] > x0 and c["x0"] < x1]
+        return extract_text(inside) if inside else ""
+    return text_in
+
+
+def locate_table(page, profile: LayoutProfile) -> TableRegion | None:
+    """
+    find_region on pdfplumber `page` (page 1). Searching reuses the page's
+    layout objects, so it costs little once page 1 is read anyway.
+    """
+    def search(pattern):
+        return [(m["top"], m["bottom"]) for m in page.search(pattern, case=False, return_chars=False)]
+
+    return find_region(profile, page.bbox, search, _plumber_text_in(page))
+
+
+def region_text(page, region: TableRegion) -> str | None:
+    """cropped_text for a later pdfplumber `page`; None also when its size differs."""
+    if tuple(page.bbox) != region.page_bbox:
+        return None
+    return cropped_text(region, _plumber_text_in(page))
@@ -0,0 +1,220 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from common.transactions import FIELDS, iter_values
+
+# SQLite file of the per-account ledger; the ledger endpoints are off unless set
+LEDGER_DB = os.environ.get("LEDGER_DB") or None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    bank TEXT,
+    card_type TEXT,
+    from_date TEXT,
+    to_date TEXT,
+    transactions INTEGER NOT NULL DEFAULT 0,
+    added INTEGER NOT NULL DEFAULT 0,
+    ingested_at REAL NOT NULL,
+    UNIQUE (account, sha256)
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    tx_key TEXT NOT NULL,
+    occurrence INTEGER NOT NULL,
+    statement_id INTEGER NOT NULL REFERENCES statements (id),
+    transaction_date TEXT,
+    description TEXT,
+    debit REAL,
+    credit REAL,
+    amount REAL,
+    bank TEXT,
+    card_type TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ledger_identity ON ledger (account, tx_key, occurrence);
+CREATE INDEX IF NOT EXISTS ledger_account_date ON ledger (account, transaction_date);
+"""
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+class LedgerDisabled(Exception):
+    """Raised when the ledger is used without LEDGER_DB configured."""
+
+
+def normalize_description(description: str | None) -> str:
+    """Case, punctuation and spacing differ between statement formats; words don't."""
+    return " ".join(_NON_WORD_RE.sub(" ", (description or "").casefold()).split())
+
+
+def transaction_key(transaction_date: str | None, debit: float, credit: float, description: str | None) -> str:
+    """Identity of a transaction across statements: date, signed amount in cents, normalized description."""
+    cents = round(((credit or 0.0) - (debit or 0.0)) * 100)
+    raw = f"{transaction_date or ''}\0{cents}\0{normalize_description(description)}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Ledger:
+    """
+    Transactions of every statement ingested for an account, de-duplicated
+    across statements, in SQLite.
+
+    A transaction's identity is a hash of its date, signed amount and
+    normalized description, plus its occurrence number within its statement:
+    two identical coffees on one day are (key, 1) and (key, 2). Ingesting a
+    statement inserts its (key, occurrence) pairs and skips those already
+    present, so the part of a period that overlaps an earlier statement adds
+    nothing, while a third coffee that only the new statement has is added.
+    Identity checks and per-account date ranges are both served from indexes.
+    """
+
+    def __init__(self, path: str | None = LEDGER_DB):
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            with self._lock, self._db:
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.executescript(_SCHEMA)
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def _require(self):
+        if self._db is None:
+            raise LedgerDisabled("The ledger is not enabled; set LEDGER_DB")
+
+    # ---------- ingestion ----------
+
+    def ingest(self, account: str, sha256: str, result: dict) -> dict:
+        """
+        Add a parse result's transactions to `account`. A statement already
+        ingested for the account (same file) is recognised and left alone.
+        Returns {"statement_id", "bank", "from_date", "to_date", "transactions",
+        "added", "skipped", "duplicate"}.
+        """
+        self._require()
+        transactions = result.get("transactions") or []
+        with self._lock, self._db:
+            known = self._ingested(account, sha256)
+            if known is not None:
+                return known
+
+            statement_id = self._db.execute(
+                "INSERT INTO statements (account, sha256, bank, card_type, from_date, to_date, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (account, sha256, result.get("bank"), result.get("card_type"),
+                 result.get("from_date"), result.get("to_date"), time.time()),
+            ).lastrowid
+
+            seen = Counter()
+            rows = []
+            for date, description, debit, credit, amount, bank, card_type in iter_values(transactions, FIELDS):
+                key = transaction_key(date, debit, credit, description)
+                seen[key] += 1
+                rows.append((account, key, seen[key], statement_id, date, description,
+                             debit, credit, amount, bank, card_type))
+
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO ledger (account, tx_key, occurrence, statement_id, transaction_date, "
+                "description, debit, credit, amount, bank, card_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = self._db.total_changes - before
+            self._db.execute(
+                "UPDATE statements SET transactions = ?, added = ? WHERE id = ?", (len(rows), added, statement_id)
+            )
+        return {"statement_id": statement_id, "bank": result.get("bank"), "from_date": result.get("from_date"),
+                "to_date": result.get("to_date"), "transactions": len(rows), "added": added,
+                "skipped": len(rows) - added, "duplicate": False}
+
+    def ingested(self, account: str, sha256: str) -> dict | None:
+        """What ingest() reports for a file already ingested for the account, else None; saves parsing it."""
+        self._require()
+        with self._lock:
+            return self._ingested(account, sha256)
+
+    def _ingested(self, account: str, sha256: str) -> dict | None:
+        row = self._db.execute(
+            "SELECT id, bank, from_date, to_date, transactions FROM statements WHERE account = ? AND sha256 = ?",
+            (account, sha256),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"statement_id": row["id"], "bank": row["bank"], "from_date": row["from_date"],
+                "to_date": row["to_date"], "transactions": row["transactions"], "added": 0,
+                "skipped": row["transactions"], "duplicate": True}
+
+    # ---------- queries ----------
+
+    def transactions(self, account: str, date_from: str | None = None, date_to: str | None = None,
+                     fields: tuple[str, ...] = FIELDS, offset: int = 0, limit: int | None = None) -> dict:
+        """
+        The account's transactions between two ISO dates (inclusive, either
+        optional) in date order, with a summary over the whole range.
+        `fields` must come from common.transactions.select_fields.
+        """
+        self._require()
+        where, params = self._range(account, date_from, date_to)
+        columns = ", ".join(fields)
+        with self._lock:
+            totals = self._db.execute(
+                "SELECT COUNT(*) AS n, COALESCE(SUM(debit), 0.0) AS debit, COALESCE(SUM(credit), 0.0) AS credit "
+                f"FROM ledger WHERE {where}",
+                params,
+            ).fetchone()
+            rows = self._db.execute(
+                f"SELECT {columns} FROM ledger WHERE {where} ORDER BY transaction_date, id LIMIT ? OFFSET ?",
+                (*params, -1 if limit is None else limit, offset),
+            ).fetchall()
+        summary = {
+            "record_count": totals["n"],
+            "total_debit": totals["debit"],
+            "total_credit": totals["credit"],
+            "net_change": totals["credit"] - totals["debit"],
+        }
+        result = {"account": account, "from_date": date_from, "to_date": date_to, "summary": summary,
+                  "transactions": [dict(zip(fields, row)) for row in rows]}
+        if offset or limit is not None:
+            result["pagination"] = {"offset": offset, "limit": limit, "total": totals["n"]}
+        return result
+
+    def statements(self, account: str) -> list[dict]:
+        self._require()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, sha256, bank, card_type, from_date, to_date, transactions, added, ingested_at "
+                "FROM statements WHERE account = ? ORDER BY from_date, id",
+                (account,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    @staticmethod
+    def _range(account: str, date_from: str | None, date_to: str | None) -> tuple[str, list]:
+        clauses, params = ["account = ?"], [account]
+        if date_from:
+            clauses.append("transaction_date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("transaction_date <= ?")
+            params.append(date_to)
+        return " AND ".join(clauses), params
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
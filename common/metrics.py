@@ -0,0 +1,207 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ---------- per-request stage timing ----------
+
+_current: ContextVar["Collector | None"] = ContextVar("metrics_collector", default=None)
+
+
+class Collector:
+    """
+    Accumulates exclusive (self) time per stage for one request. Nested stages
+    are subtracted from their parent, so "parse" excludes the "extract" and
+    "dates" time spent inside it and the stages add up to the wall time.
+    """
+
+    __slots__ = ("stages", "info", "_stack")
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.info: dict = {}
+        self._stack: list[_Stage] = []
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, timings: dict):
+        """Fold in timings returned from a worker (see timed_call)."""
+        for name, seconds in timings.get("stages", {}).items():
+            self.add(name, seconds)
+        self.info.update(timings.get("info", {}))
+
+    def as_dict(self) -> dict:
+        return {"stages": dict(self.stages), "info": dict(self.info)}
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+
+class _Stage:
+    __slots__ = ("collector", "name", "start", "children")
+
+    def __init__(self, collector: Collector, name: str):
+        self.collector = collector
+        self.name = name
+
+    def __enter__(self):
+        self.children = 0.0
+        self.collector._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.collector._stack
+        stack.pop()
+        self.collector.add(self.name, elapsed - self.children)
+        if stack:
+            stack[-1].children += elapsed
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """Time a block as `name` when a collector is active; a no-op otherwise."""
+    collector = _current.get()
+    if collector is None:
+        return _NO_STAGE
+    return _Stage(collector, name)
+
+
+def note(key: str, value):
+    """Attach a request-level value (page count, bank, ...) to the active collector."""
+    collector = _current.get()
+    if collector is not None:
+        collector.info[key] = value
+
+
+@contextmanager
+def collect():
+    collector = Collector()
+    token = _current.set(collector)
+    try:
+        yield collector
+    finally:
+        _current.reset(token)
+
+
+def merge_worker(timings: dict, wall_seconds: float):
+    """
+    Fold a worker's timings into the active collector; whatever part of the
+    wall time the worker didn't account for was spent queued or in transit.
+    """
+    collector = _current.get()
+    if collector is None:
+        return
+    collector.merge(timings)
+    collector.add("queue", max(0.0, wall_seconds - sum(timings.get("stages", {}).values())))
+
+
+def timed_call(fn, *args):
+    """Run fn(*args) under a fresh collector; returns (result, timings). Picklable for the pool."""
+    with collect() as collector:
+        result = fn(*args)
+    return result, collector.as_dict()
+
+
+# ---------- Prometheus histograms ----------
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PAGES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, n in zip(self.buckets, counts):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {n}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {count}")
+                lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "statement_stage_seconds", "Exclusive time spent in each pipeline stage", SECONDS_BUCKETS, ("bank", "stage")
+)
+REQUEST_SECONDS = Histogram(
+    "statement_request_seconds", "End-to-end request time", SECONDS_BUCKETS, ("endpoint", "bank", "cache")
+)
+DOCUMENT_PAGES = Histogram("statement_document_pages", "Pages per processed statement", PAGES_BUCKETS, ("bank",))
+UPLOAD_BYTES = Histogram("statement_upload_bytes", "Upload size", BYTES_BUCKETS, ("endpoint",))
+
+HISTOGRAMS = [STAGE_SECONDS, REQUEST_SECONDS, DOCUMENT_PAGES, UPLOAD_BYTES]
+
+
+def observe_request(collector: Collector, endpoint: str, seconds: float, bank: str | None = None,
+                    cache: str = "", upload_bytes: int | None = None):
+    bank = (bank or collector.info.get("bank") or "unknown").lower().replace(" ", "")
+    for name, value in collector.stages.items():
+        STAGE_SECONDS.observe(value, bank=bank, stage=name)
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint, bank=bank, cache=cache)
+    if "pages" in collector.info:
+        DOCUMENT_PAGES.observe(collector.info["pages"], bank=bank)
+    if upload_bytes is not None:
+        UPLOAD_BYTES.observe(upload_bytes, endpoint=endpoint)
+
+
+def render_prometheus(gauges: dict[str, float] | None = None, counters: dict[str, float] | None = None) -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for kind, values in (("gauge", gauges), ("counter", counters)):
+        for name, value in (values or {}).items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -1,77 +1,81 @@
-import pdfplumber
-from pdfminer.pdfdocument import PDFPasswordIncorrect
-from datetime import datetime
+import io
+from common.dates import parse_date
+from common.metrics import stage
+from common.transactions import TransactionBatch
 
 def normalize_date(raw_date: str, fmt: str | None = None) -> str:
     """
     Normalize a date string into ISO format YYYY-MM-DD.
-    If fmt is provided, it tries that format first.
-    If fmt is None or parsing fails, returns ''.
+    If fmt is provided, only that format is tried; otherwise the common
+    statement formats are. Yearless dates get the current year.
+    Returns '' when nothing matches. Parsers that convert many dates should
+    use a per-document common.dates.DateResolver instead.
     """
-    if not raw_date:
-        return ""
+    with stage("dates"):
+        return parse_date(raw_date, fmt)
 
-    raw = raw_date.strip().upper().replace(".", "").replace(",", "")
+def as_pdf_source(source):
+    """pdfplumber takes paths or file-likes; wrap raw upload bytes."""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
 
-    # If explicit format is known, use it directly
-    if fmt:
-        try:
-            dt = datetime.strptime(raw, fmt)
-            # Fill missing year (for 15/08, 14 AUG)
-            if dt.year == 1900:
-                dt = dt.replace(year=datetime.now().year)
-            return dt.strftime("%Y-%m-%d")
-        except ValueError:
-            return ""
-
-    # Optional fallback formats for generic parsing
-    fallback_patterns = [
-        "%d/%m/%Y",
-        "%d/%m/%y",
-        "%d/%m",
-        "%d %b %Y",
-        "%d %b",
-        "%d%b%y",
-        "%d%b%Y",
-    ]
-
-    for p in fallback_patterns:
-        try:
-            dt = datetime.strptime(raw, p)
-            if dt.year == 1900:
-                dt = dt.replace(year=datetime.now().year)
-            return dt.strftime("%Y-%m-%d")
-        except ValueError:
-            continue
+def open_pdf_safe(file_path, password: str | None = None):
+    """Open a PDF (path, file-like or bytes) with proper error handling for wrong password."""
+    # imported here so app start-up doesn't pay for pdfminer
+    import pdfplumber
+    from pdfminer.pdfdocument import PDFPasswordIncorrect
 
-    return ""
-
-def open_pdf_safe(file_path: str, password: str | None = None):
-    """Open a PDF with proper error handling for wrong password."""
     try:
-        return pdfplumber.open(file_path, password=password)
+        with stage("open"):
+            return pdfplumber.open(as_pdf_source(file_path), password=password)
     except PDFPasswordIncorrect:
         return {"error": "Invalid password for PDF"}
     except Exception as e:
         return {"error": f"Failed to open PDF: {str(e)}"}
 
+def release_page(page):
+    """Drop a pdfplumber page's parsed chars and layout; they are rebuilt if needed again."""
+    page.close()
+
+def iter_pages(pdf, indexes=None):
+    """
+    Yield (index, page) for a pdfplumber PDF in order, releasing each page's
+    cached layout objects once the caller moves on. pdfplumber otherwise keeps
+    every visited page's chars alive until the PDF is closed, so page-by-page
+    walks go through here to hold one page's worth at a time.
+    """
+    for index in (range(len(pdf.pages)) if indexes is None else indexes):
+        page = pdf.pages[index]
+        try:
+            yield index, page
+        finally:
+            release_page(page)
+
+def normalize_transaction(tx: dict, bank: str, card_type: str) -> dict:
+    """Return a single transaction in the common output structure."""
+    return {
+        "transaction_date": tx.get("transaction_date", ""),
+        "description": tx.get("description", ""),
+        "debit": tx.get("debit", 0.0),
+        "credit": tx.get("credit", 0.0),
+        "amount": tx.get("amount", 0.0),
+        "bank": bank,
+        "card_type": card_type
+    }
+
 def normalize_transactions(transactions: list, bank: str, card_type:str):
     """Ensure all transactions return the same structure."""
-    normalized = []
-    for tx in transactions:
-        normalized.append({
-            "transaction_date": tx.get("transaction_date", ""),
-            "description": tx.get("description", ""),
-            "debit": tx.get("debit", 0.0),
-            "credit": tx.get("credit", 0.0),
-            "amount": tx.get("amount", 0.0),
-            "bank": bank,
-            "card_type": card_type
-        })
-    return normalized
+    return [normalize_transaction(tx, bank, card_type) for tx in transactions]
+
+def summarize_transactions(transactions: list[dict] | TransactionBatch) -> dict:
+    """Return summary stats for a list of transactions (batches keep running totals)."""
+    with stage("summarize"):
+        if isinstance(transactions, TransactionBatch):
+            return transactions.summary()
+        return _summarize(transactions)
 
-def summarize_transactions(transactions: list[dict]) -> dict:
-    """Return summary stats for a list of transactions."""
+def _summarize(transactions: list[dict]) -> dict:
     record_count = len(transactions)
     total_debit = sum(t.get("debit", 0.0) for t in transactions)
     total_credit = sum(t.get("credit", 0.0) for t in transactions)
@@ -0,0 +1,39 @@
+from fastapi.responses import JSONResponse
+
+from common.transactions import FIELDS, dumps, project_transactions, select_fields
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson-encoded JSONResponse; also knows how to encode TransactionBatch."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def result_shape(fields: str | None = None, compact: bool = False, offset: int = 0,
+                 limit: int | None = None) -> dict | None:
+    """
+    Validated projection/pagination options from the query string, or None
+    when the full result was asked for. Raises ValueError on bad input.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must not be negative")
+    selected = select_fields(fields, compact)
+    if selected == FIELDS and not offset and limit is None:
+        return None
+    return {"fields": selected, "offset": offset, "limit": limit}
+
+
+def shape_result(result: dict, shape: dict | None) -> dict:
+    """
+    A copy of `result` with its transactions projected and paginated. Results
+    may be shared with the cache, so the original is never modified.
+    """
+    if shape is None or not isinstance(result, dict) or "transactions" not in result:
+        return result
+    transactions = result["transactions"]
+    shaped = dict(result)
+    shaped["transactions"] = project_transactions(transactions, shape["fields"], shape["offset"], shape["limit"])
+    if shape["offset"] or shape["limit"] is not None:
+        shaped["pagination"] = {"offset": shape["offset"], "limit": shape["limit"], "total": len(transactions)}
+    return shaped
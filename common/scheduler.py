@@ -0,0 +1,251 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+
+from common.engines import count_pages
+from common.executor import MAX_WORKERS, ExecutorBusy
+from common.metrics import stage
+
+# documents parsed/previewed at once; the rest wait here instead of all
+# starting together and slowing every request down on a shared CPU
+PARSE_CONCURRENCY = int(os.environ.get("PARSE_CONCURRENCY") or MAX_WORKERS)
+# Memory is dominated by open documents, roughly in proportion to their page
+# count, so it is budgeted in pages: a 150-page statement weighs as much as
+# thirty 5-page ones.
+MEMORY_BUDGET_PAGES = int(os.environ.get("MEMORY_BUDGET_PAGES", "300"))
+# documents allowed to wait; past this new ones are turned away at once
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "64"))
+# how long a document may wait before the request gets a 503
+BUDGET_WAIT_SECONDS = float(os.environ.get("BUDGET_WAIT_SECONDS", "15"))
+
+# forget per-flow finish tags once this many flows have been seen
+_MAX_FLOWS = 1024
+
+
+class _Ticket:
+    __slots__ = ("pages", "flow", "tag", "enqueued", "future")
+
+    def __init__(self, pages: int, flow: str, future: asyncio.Future):
+        self.pages = pages
+        self.flow = flow
+        self.tag = 0.0
+        self.enqueued = time.monotonic()
+        self.future = future
+
+
+class Scheduler:
+    """
+    Admission control in front of parse/preview work. A document starts when
+    a concurrency slot is free and its pages fit the memory budget; otherwise
+    it queues for up to `wait_seconds` and then fails with ExecutorBusy
+    (a 503 with Retry-After, or a requeue for background jobs).
+
+    Waiting documents are grouped in flows (one per client). Within a flow
+    the smallest page count goes first; between flows the queue is weighted
+    fair (self-clocked fair queuing) with page count as the cost. Each flow's
+    next document is tagged with the later of the virtual time and the tag
+    of the flow's last start, plus its pages, and the lowest tag starts next;
+    the virtual time is the tag of the last document started. A 200-page
+    statement is thus tagged 200 pages out and other clients' 3-page ones go
+    first, but each start moves the virtual time on, so it gets its turn
+    once every other busy client has had about 200 pages' worth. One
+    caller's burst only pushes back that caller's own documents; past the
+    queue limit or wait time callers get a 503 instead.
+
+    A document larger than the whole budget is charged the full budget so it
+    runs alone instead of never; likewise one that only waits on pages held
+    through charge() starts once nothing else is running. Event-loop only;
+    not thread-safe.
+    """
+
+    def __init__(self, concurrency: int = PARSE_CONCURRENCY, capacity: int = MEMORY_BUDGET_PAGES,
+                 max_queue: int = ADMISSION_MAX_QUEUE, wait_seconds: float = BUDGET_WAIT_SECONDS):
+        self.concurrency = max(1, concurrency)
+        self.capacity = max(1, capacity)
+        self.max_queue = max_queue
+        self.wait_seconds = wait_seconds
+        self.running = 0
+        self.in_use = 0
+        self.charged = 0  # of in_use, pages held outside any running document (see charge())
+        # each waiting flow's head (its smallest document) by tag; entries
+        # whose ticket is no longer that flow's head are skipped
+        self._heap: list[tuple[float, int, _Ticket]] = []
+        self._heads: dict[str, _Ticket] = {}
+        # the rest of each flow's waiting documents, smallest first
+        self._pending: dict[str, list[tuple[int, int, _Ticket]]] = {}
+        self._seq = itertools.count()
+        self._virtual = 0.0
+        self._finish: dict[str, float] = {}
+        self._waiting = 0
+        self._waiting_pages = 0
+        # counters for /metrics
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+
+    def _fits(self, pages: int) -> bool:
+        if self.running == 0:
+            return True  # only charged pages to wait for, and those aren't freed by waiting
+        return self.running < self.concurrency and self.in_use + pages <= self.capacity
+
+    def _start(self, ticket: _Ticket):
+        self.running += 1
+        self.in_use += ticket.pages
+        self._finish[ticket.flow] = ticket.tag
+        self._virtual = max(self._virtual, ticket.tag)
+        self.admitted += 1
+        self.wait_seconds_total += time.monotonic() - ticket.enqueued
+        if len(self._finish) > _MAX_FLOWS:
+            # tags at or behind the virtual time no longer affect anyone
+            self._finish = {flow: tag for flow, tag in self._finish.items() if tag > self._virtual}
+
+    def _base(self, flow: str) -> float:
+        return max(self._virtual, self._finish.get(flow, 0.0))
+
+    def _make_head(self, ticket: _Ticket, base: float):
+        ticket.tag = base + ticket.pages
+        self._heads[ticket.flow] = ticket
+        heapq.heappush(self._heap, (ticket.tag, next(self._seq), ticket))
+
+    def _next_head(self, flow: str):
+        """Promote the flow's smallest waiting document once its head started or left."""
+        del self._heads[flow]
+        pending = self._pending.get(flow)
+        while pending:
+            ticket = heapq.heappop(pending)[2]
+            if not ticket.future.done():
+                self._make_head(ticket, self._base(flow))
+                break
+        if not pending:
+            self._pending.pop(flow, None)
+
+    def _enqueue(self, ticket: _Ticket):
+        head = self._heads.get(ticket.flow)
+        if head is None:
+            self._make_head(ticket, self._base(ticket.flow))
+            return
+        if ticket.pages < head.pages:
+            # smaller than the flow's head: takes its place (and its base)
+            self._make_head(ticket, head.tag - head.pages)
+            ticket, head = head, ticket
+        heapq.heappush(self._pending.setdefault(ticket.flow, []), (ticket.pages, next(self._seq), ticket))
+
+    async def acquire(self, pages: int, flow: str = "") -> int:
+        """Wait for a slot and `pages` (clamped to the budget); returns what to release()."""
+        pages = min(max(1, pages), self.capacity)
+        ticket = _Ticket(pages, flow, asyncio.get_running_loop().create_future())
+
+        if not self._waiting and self._fits(pages):
+            ticket.tag = self._base(flow) + pages
+            self._start(ticket)
+            return pages
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusy("Parser queue is full, retry shortly")
+
+        self._enqueue(ticket)
+        self._waiting += 1
+        self._waiting_pages += pages
+        self._dispatch()  # a lower tag than whoever blocks the head may fit right away
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout=self.wait_seconds)
+        except asyncio.TimeoutError:
+            if self._abandon(ticket):
+                self.rejected += 1
+                raise ExecutorBusy("Parser queue is full, retry shortly") from None
+        except asyncio.CancelledError:
+            if not self._abandon(ticket):
+                self.release(pages)  # started just as the request went away
+            raise
+        return pages
+
+    def _abandon(self, ticket: _Ticket) -> bool:
+        """Withdraw a waiting ticket; False when it was started in the meantime."""
+        if ticket.future.done():
+            return False
+        ticket.future.cancel()  # its heap entries are skipped when they surface
+        self._waiting -= 1
+        self._waiting_pages -= ticket.pages
+        if self._heads.get(ticket.flow) is ticket:
+            self._next_head(ticket.flow)
+        self._dispatch()
+        return True
+
+    def release(self, pages: int):
+        self.running -= 1
+        self.in_use -= pages
+        self._dispatch()
+
+    def charge(self, pages: int):
+        """
+        Count `pages` held open outside a parse (e.g. an upload session)
+        against the budget until discharge(); they take no concurrency slot.
+        """
+        self.in_use += pages
+        self.charged += pages
+
+    def discharge(self, pages: int):
+        self.in_use -= pages
+        self.charged -= pages
+        self._dispatch()
+
+    def _dispatch(self):
+        # only the lowest tag may start: letting smaller documents past it
+        # whenever it doesn't fit would starve it
+        heap = self._heap
+        while heap:
+            tag, _, ticket = heap[0]
+            if ticket.future.done() or self._heads.get(ticket.flow) is not ticket or ticket.tag != tag:
+                heapq.heappop(heap)
+                continue
+            if not self._fits(ticket.pages):
+                break
+            heapq.heappop(heap)
+            self._waiting -= 1
+            self._waiting_pages -= ticket.pages
+            self._start(ticket)
+            self._next_head(ticket.flow)
+            ticket.future.set_result(None)
+
+    async def admit(self, source, password: str | None = None, flow: str = "", pages: int | None = None) -> int:
+        """
+        acquire() for a document (path or raw bytes) weighted by its page
+        count; pass `pages` when it is already known, e.g. for an open document.
+        """
+        if pages is None:
+            pages = await asyncio.to_thread(count_pages, source, password)
+        with stage("admission"):
+            return await self.acquire(pages or 1, flow)
+
+    @asynccontextmanager
+    async def hold(self, source, password: str | None = None, flow: str = "", pages: int | None = None):
+        """Run the block once the document is admitted; frees its slot and pages after."""
+        granted = await self.admit(source, password, flow, pages)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+    def oldest_wait(self) -> float:
+        now = time.monotonic()
+        waiting = [*self._heads.values(), *(t for pending in self._pending.values() for _, _, t in pending)]
+        return max((now - t.enqueued for t in waiting if not t.future.done()), default=0.0)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "capacity_pages": self.capacity,
+            "in_use_pages": self.in_use,
+            "charged_pages": self.charged,
+            "queued": self._waiting,
+            "queued_pages": self._waiting_pages,
+            "max_queue": self.max_queue,
+            "oldest_wait_seconds": self.oldest_wait(),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds_total,
+        }
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import secrets
+import time
+from collections import OrderedDict
+
+from common import executor
+
+# idle sessions are closed after this long; every use restarts the clock
+SESSION_TTL_SECONDS = int(os.environ.get("DOCUMENT_SESSION_TTL_SECONDS", "300"))
+# sessions kept at once, and their pages in total; least recently used
+# sessions are closed to make room. Session pages are charged to the
+# scheduler's memory budget, so at most half of it goes to sessions.
+SESSION_MAX_ENTRIES = int(os.environ.get("DOCUMENT_SESSION_MAX", "16"))
+SESSION_MAX_PAGES = int(os.environ.get("DOCUMENT_SESSION_MAX_PAGES", "150"))
+CLEANUP_EVERY_SECONDS = 30.0
+
+
+class SessionExpired(Exception):
+    """Raised when a document session was closed (expired, evicted or deleted) before use."""
+
+
+class SessionTooLarge(Exception):
+    """Raised when a document has more pages than all sessions together may hold."""
+
+
+class DocumentSession:
+    """
+    An uploaded statement kept between requests: its buffer, password and
+    the full page text extracted for it so far. Work on it runs on the parser
+    pool, one request at a time per session; the worker reopens the PDF and
+    gets the known page text, and the text it extracts is kept for the next
+    request, so a preview and a parse lay each page out once.
+    """
+
+    def __init__(self, session_id: str, upload, password: str | None, pages: int, filename: str | None,
+                 ttl: float, on_release=None):
+        self.id = session_id
+        self.upload = upload  # removed with the session
+        self.password = password
+        self.pages = pages
+        self.filename = filename
+        self.texts: dict[int, str] = {}
+        self.expires = time.monotonic() + ttl
+        self.closed = False
+        self._lock = asyncio.Lock()
+        self._on_release = on_release
+        self._released = False
+
+    @property
+    def sha256(self) -> str:
+        return self.upload.sha256
+
+    async def run(self, fn, *args):
+        """
+        Await fn(source, password, texts, *args) on the parser pool; fn
+        returns (result, newly extracted page texts), and the result is returned.
+        """
+        async with self._lock:
+            if self.closed:
+                raise SessionExpired("Document session has expired")
+            try:
+                result, texts = await executor.run_job(fn, self.upload.source, self.password, self.texts, *args)
+            finally:
+                if self.closed:
+                    self._release()  # closed while the pool was using the buffer
+            self.texts.update(texts)
+            return result
+
+    def close(self):
+        """Close now, or once the request using the buffer is done with it."""
+        self.closed = True
+        if not self._lock.locked():
+            self._release()
+
+    def _release(self):
+        if self._released:
+            return
+        self._released = True
+        self.texts = {}
+        self.upload.close()
+        if self._on_release is not None:
+            self._on_release(self.pages)
+
+
+class SessionStore:
+    """
+    Open upload sessions by id, bounded by count and total pages (LRU) and
+    closed after SESSION_TTL_SECONDS without use. With a `scheduler`, live
+    sessions' pages are charged to its memory budget (and the page bound is
+    kept to half of it, leaving room to parse). Event-loop only.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS, max_entries: int = SESSION_MAX_ENTRIES,
+                 max_pages: int = SESSION_MAX_PAGES, scheduler=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_pages = max_pages if scheduler is None else min(max_pages, scheduler.capacity // 2)
+        self.scheduler = scheduler
+        self._sessions: OrderedDict[str, DocumentSession] = OrderedDict()
+        self._pages = 0
+        self.counters = {"created": 0, "expired": 0, "evicted": 0, "deleted": 0}
+
+    def add(self, upload, password: str | None, pages: int, filename: str | None = None) -> DocumentSession:
+        """
+        Keep the `upload` buffer of a `pages`-page document under a new id. It
+        is owned by the store from here on, and closed right away when the
+        document is too large to keep.
+        """
+        if self.max_entries <= 0 or pages > self.max_pages:
+            upload.close()
+            raise SessionTooLarge(f"Document exceeds {self.max_pages} pages for an upload session")
+        self.purge_expired()
+        while self._sessions and (len(self._sessions) >= self.max_entries
+                                  or self._pages + pages > self.max_pages):
+            _, oldest = self._sessions.popitem(last=False)
+            self._discard(oldest)
+            self.counters["evicted"] += 1
+
+        on_release = self.scheduler.discharge if self.scheduler is not None else None
+        session = DocumentSession(secrets.token_urlsafe(16), upload, password, pages, filename, self.ttl, on_release)
+        if self.scheduler is not None:
+            self.scheduler.charge(pages)
+        self._sessions[session.id] = session
+        self._pages += session.pages
+        self.counters["created"] += 1
+        return session
+
+    def get(self, session_id: str) -> DocumentSession | None:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if session.expires <= time.monotonic():
+            self._remove(session_id)
+            self.counters["expired"] += 1
+            return None
+        session.expires = time.monotonic() + self.ttl
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        if session_id not in self._sessions:
+            return False
+        self._remove(session_id)
+        self.counters["deleted"] += 1
+        return True
+
+    def purge_expired(self):
+        now = time.monotonic()
+        for session_id in [s.id for s in self._sessions.values() if s.expires <= now]:
+            self._remove(session_id)
+            self.counters["expired"] += 1
+
+    def close(self):
+        while self._sessions:
+            _, session = self._sessions.popitem()
+            session.close()
+        self._pages = 0
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "open": len(self._sessions),
+            "pages": self._pages,
+            "max_entries": self.max_entries,
+            "max_pages": self.max_pages,
+            "ttl_seconds": self.ttl,
+        }
+
+    def _remove(self, session_id: str):
+        self._discard(self._sessions.pop(session_id))
+
+    def _discard(self, session: DocumentSession):
+        self._pages -= session.pages
+        session.close()
+
+
+async def run_cleanup(store: SessionStore):
+    while True:
+        store.purge_expired()
+        await asyncio.sleep(CLEANUP_EVERY_SECONDS)
@@ -0,0 +1,141 @@
+import gzip
+import hashlib
+import os
+import threading
+import zlib
+
+import orjson
+
+from common.cache import make_key
+from common.engines import engine_signature
+from common.extract import can_reopen
+from common.layouts import layout_signature
+from common.metrics import stage
+
+# Page text of every parsed statement, kept so a parser fix can be applied to
+# archived statements without extracting them again. Disabled unless a
+# directory is configured.
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR") or None
+# bump when the snapshot layout changes; older files are then ignored
+SNAPSHOT_FORMAT = "snapshot-1"
+_COMPRESS_LEVEL = 6
+_SUFFIX = ".json.gz"
+
+
+class StaleSnapshot(Exception):
+    """Raised when a snapshot's text was extracted with another engine or cropping setup than the current one."""
+
+
+def extraction_signature() -> str:
+    """Engine and cropping setup that page text depends on, as recorded in snapshots."""
+    return engine_signature() + ";" + layout_signature()
+
+
+def content_hash(source) -> str:
+    """sha256 of raw PDF bytes or of the file at a path (what uploads are keyed by)."""
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """
+    Gzipped JSON snapshots of extracted page text, one per document under
+    <dir>/<key[:2]>/<key>.json.gz. The key is the document's sha256 with the
+    password folded in (as for the parse cache), so the text of an encrypted
+    statement is only found again by someone who could decrypt it.
+
+    A snapshot holds the page text exactly as the parser saw it (after the
+    engine choice and layout cropping, see `extraction`) and the bank
+    detection, so re-parsing it runs the bank parser and nothing else.
+    """
+
+    def __init__(self, directory: str | None = SNAPSHOT_DIR):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def path(self, sha256: str, password: str | None = None) -> str:
+        key = make_key(sha256, None, password, SNAPSHOT_FORMAT)
+        return os.path.join(self.directory, key[:2], key + _SUFFIX)
+
+    def record(self, doc, detection: dict):
+        """Snapshot a parsed StatementDocument; failures are ignored, never the parse's problem."""
+        if not self.enabled or not can_reopen(doc.source):
+            return
+        with stage("snapshot"):
+            try:
+                sha256 = content_hash(doc.source)
+                snapshot = {
+                    "format": SNAPSHOT_FORMAT,
+                    "sha256": sha256,
+                    "extraction": extraction_signature(),
+                    "engine": doc.engine,
+                    "detection": detection,
+                    "pages": [doc.page_text(i) for i in range(doc.page_count)],
+                }
+                self._write(self.path(sha256, doc.password), snapshot)
+            except OSError:
+                pass
+
+    def load(self, sha256: str, password: str | None = None) -> dict | None:
+        """The document's snapshot, or None; raises StaleSnapshot as load_snapshot does."""
+        if not self.enabled:
+            return None
+        return load_snapshot(self.path(sha256, password))
+
+    def paths(self):
+        """Every snapshot file, e.g. for a bulk re-import."""
+        if not self.enabled:
+            return
+        for entry in sorted(os.scandir(self.directory), key=lambda e: e.name):
+            if entry.is_dir() and len(entry.name) == 2:
+                for name in sorted(os.listdir(entry.path)):
+                    if name.endswith(_SUFFIX):
+                        yield os.path.join(entry.path, name)
+
+    @staticmethod
+    def _write(path: str, snapshot: dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                fh.write(gzip.compress(orjson.dumps(snapshot), compresslevel=_COMPRESS_LEVEL, mtime=0))
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+
+def load_snapshot(path: str) -> dict | None:
+    """
+    A snapshot file's contents, or None when missing, unreadable or of
+    another format. Raises StaleSnapshot when the text was extracted with
+    another engine or cropping setup: parsers are tuned to the current one,
+    so the PDF has to be parsed again (which replaces the snapshot).
+    """
+    try:
+        with open(path, "rb") as fh:
+            snapshot = orjson.loads(gzip.decompress(fh.read()))
+    except (OSError, EOFError, zlib.error, orjson.JSONDecodeError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        return None
+    current = extraction_signature()
+    if snapshot.get("extraction") != current:
+        raise StaleSnapshot(
+            f"Snapshot text was extracted with {snapshot.get('extraction')!r}, not the current {current!r}; "
+            "parse the PDF again to refresh it"
+        )
+    return snapshot
@@ -0,0 +1,96 @@
+import queue
+
+import orjson
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# NDJSON is sent back from a parser worker in chunks of about this size
+STREAM_CHUNK_BYTES = 16 * 1024
+_SEND_POLL_SECONDS = 0.25
+
+
+def wants_ndjson(accept: str | None, stream: str | None) -> bool:
+    """True for `Accept: application/x-ndjson` or a truthy `?stream=` flag."""
+    if stream and stream.strip().lower() in {"1", "true", "yes", "on"}:
+        return True
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept.lower()
+
+
+def _line(record: dict) -> bytes:
+    return orjson.dumps(record) + b"\n"
+
+
+def ndjson_error(message: str) -> bytes:
+    """The record a stream ends with when the parse fails part way."""
+    return _line({"record": "error", "error": message})
+
+
+def ndjson_records(transactions, meta: dict, fields: tuple[str, ...] | None = None):
+    """
+    Encode transactions as NDJSON as they are produced, followed by trailing
+    header, period and summary records. The summary is accumulated on the fly
+    so the full transaction list is never held in memory. `fields` limits
+    what each transaction record carries (see common.transactions.select_fields).
+    """
+    record_count = 0
+    total_debit = 0.0
+    total_credit = 0.0
+    try:
+        for tx in transactions:
+            record_count += 1
+            total_debit += tx.get("debit", 0.0)
+            total_credit += tx.get("credit", 0.0)
+            if fields is not None:
+                tx = {f: tx.get(f) for f in fields}
+            yield _line({"record": "transaction", **tx})
+    except Exception as e:
+        yield ndjson_error(str(e))
+        return
+
+    yield _line({
+        "record": "header",
+        "bank": meta.get("bank"),
+        "card_type": meta.get("card_type"),
+        "detection": meta.get("detection"),
+    })
+    yield _line({"record": "period", "from_date": meta.get("from_date"), "to_date": meta.get("to_date")})
+    yield _line({
+        "record": "summary",
+        "record_count": record_count,
+        "total_debit": total_debit,
+        "total_credit": total_credit,
+        "net_change": total_credit - total_debit,
+    })
+
+
+def ndjson_from_result(result: dict, fields: tuple[str, ...] | None = None):
+    """Stream an already materialized parse result (e.g. a cache hit) as NDJSON."""
+    return ndjson_records(result.get("transactions", []), result, fields)
+
+
+def send(channel, cancel, item) -> bool:
+    """
+    Put `item` on a stream channel (common.executor.stream_job), waiting while
+    it is full. False once `cancel` is set: the reader has gone, stop producing.
+    """
+    while not cancel.is_set():
+        try:
+            channel.put(item, timeout=_SEND_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def chunked(lines, size: int = STREAM_CHUNK_BYTES):
+    """Join NDJSON lines into chunks of at least `size` bytes (the last may be shorter)."""
+    chunk = []
+    pending = 0
+    for line in lines:
+        chunk.append(line)
+        pending += len(line)
+        if pending >= size:
+            yield b"".join(chunk)
+            chunk = []
+            pending = 0
+    if chunk:
+        yield b"".join(chunk)
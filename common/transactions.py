@@ -0,0 +1,167 @@
+import itertools
+import sys
+from array import array
+
+import orjson
+
+# order of keys in every serialized transaction
+FIELDS = ("transaction_date", "description", "debit", "credit", "amount", "bank", "card_type")
+
+
+class TransactionBatch:
+    """
+    Transactions of one statement stored column-wise: amounts in float arrays,
+    dates and descriptions as interned strings (statements repeat the same
+    merchants and days), bank/card_type once per batch instead of per row.
+    Summary totals are kept up to date on append. Iterating yields the usual
+    row dicts, built on demand, so it can stand in for a list of transactions.
+    """
+
+    __slots__ = ("bank", "card_type", "dates", "descriptions", "debits", "credits", "amounts",
+                 "total_debit", "total_credit")
+
+    def __init__(self, bank: str, card_type: str):
+        self.bank = bank
+        self.card_type = card_type
+        self.dates: list[str] = []
+        self.descriptions: list[str] = []
+        self.debits = array("d")
+        self.credits = array("d")
+        self.amounts = array("d")
+        self.total_debit = 0.0
+        self.total_credit = 0.0
+
+    def append(self, transaction_date: str, description: str, debit: float = 0.0,
+               credit: float = 0.0, amount: float = 0.0):
+        self.dates.append(sys.intern(transaction_date) if isinstance(transaction_date, str) else transaction_date)
+        self.descriptions.append(sys.intern(description) if isinstance(description, str) else description)
+        self.debits.append(debit)
+        self.credits.append(credit)
+        self.amounts.append(amount)
+        self.total_debit += debit
+        self.total_credit += credit
+
+    def add(self, tx: dict):
+        """Append a row dict as produced by the iter_<bank> generators."""
+        self.append(
+            tx.get("transaction_date", ""),
+            tx.get("description", ""),
+            tx.get("debit", 0.0),
+            tx.get("credit", 0.0),
+            tx.get("amount", 0.0),
+        )
+
+    def extend(self, transactions):
+        for tx in transactions:
+            self.add(tx)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def row(self, index: int) -> dict:
+        return {
+            "transaction_date": self.dates[index],
+            "description": self.descriptions[index],
+            "debit": self.debits[index],
+            "credit": self.credits[index],
+            "amount": self.amounts[index],
+            "bank": self.bank,
+            "card_type": self.card_type,
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def summary(self) -> dict:
+        return {
+            "record_count": len(self),
+            "total_debit": self.total_debit,
+            "total_credit": self.total_credit,
+            "net_change": self.total_credit - self.total_debit,
+        }
+
+    def to_rows(self, fields: tuple[str, ...] = FIELDS, start: int = 0, stop: int | None = None) -> list[dict]:
+        """Row dicts for transactions [start, stop) holding only `fields`, built straight from the columns."""
+        window = slice(start, stop)
+        if fields == FIELDS:
+            bank, card_type = self.bank, self.card_type
+            return [
+                {"transaction_date": d, "description": s, "debit": dr, "credit": cr, "amount": a,
+                 "bank": bank, "card_type": card_type}
+                for d, s, dr, cr, a in zip(self.dates[window], self.descriptions[window], self.debits[window],
+                                           self.credits[window], self.amounts[window])
+            ]
+        return [dict(zip(fields, values)) for values in self.iter_values(fields, start, stop)]
+
+    def column(self, field: str, start: int = 0, stop: int | None = None):
+        """One field for rows [start, stop): a list, a float array, or a repeat of a per-batch value."""
+        window = slice(start, stop)
+        if field in _COLUMNS:
+            return getattr(self, _COLUMNS[field])[window]
+        return itertools.repeat(getattr(self, field), len(range(*window.indices(len(self)))))
+
+    def iter_values(self, fields: tuple[str, ...] = FIELDS, start: int = 0, stop: int | None = None):
+        """Row tuples ordered like `fields`, for writers that don't need dicts."""
+        return zip(*(self.column(f, start, stop) for f in fields))
+
+
+# batch attribute holding each per-row field; the rest are per batch
+_COLUMNS = {
+    "transaction_date": "dates",
+    "description": "descriptions",
+    "debit": "debits",
+    "credit": "credits",
+    "amount": "amounts",
+}
+PER_BATCH_FIELDS = ("bank", "card_type")
+
+
+def select_fields(spec: str | None, compact: bool = False) -> tuple[str, ...]:
+    """
+    Parse a `fields=transaction_date,amount` projection. `compact` drops the
+    per-row bank/card_type, which repeat the statement-level values. Raises
+    ValueError for unknown fields or when nothing is left to return.
+    """
+    fields = FIELDS
+    if spec:
+        fields = tuple(dict.fromkeys(f.strip() for f in spec.split(",") if f.strip()))
+        unknown = [f for f in fields if f not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(FIELDS)}")
+    if compact:
+        fields = tuple(f for f in fields if f not in PER_BATCH_FIELDS)
+    if not fields:
+        raise ValueError(f"No fields selected. Available: {', '.join(FIELDS)}")
+    return fields
+
+
+def project_transactions(transactions, fields: tuple[str, ...] = FIELDS, offset: int = 0,
+                         limit: int | None = None) -> list[dict]:
+    """New row dicts for a page of `transactions` (a batch or a list, e.g. from the disk cache)."""
+    stop = None if limit is None else offset + limit
+    if isinstance(transactions, TransactionBatch):
+        return transactions.to_rows(fields, offset, stop)
+    rows = transactions if isinstance(transactions, list) else list(transactions)
+    return [{f: tx.get(f) for f in fields} for tx in rows[offset:stop]]
+
+
+def iter_values(transactions, fields: tuple[str, ...] = FIELDS, offset: int = 0, limit: int | None = None):
+    """Row tuples for a page of `transactions` (a batch or a list of dicts)."""
+    stop = None if limit is None else offset + limit
+    if isinstance(transactions, TransactionBatch):
+        return transactions.iter_values(fields, offset, stop)
+    rows = transactions if isinstance(transactions, list) else list(transactions)
+    return (tuple(tx.get(f) for f in fields) for tx in rows[offset:stop])
+
+
+def _default(obj):
+    if isinstance(obj, TransactionBatch):
+        return obj.to_rows()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    """Compact JSON (orjson) for parse results; batches are expanded from their columns."""
+    return orjson.dumps(obj, default=_default)
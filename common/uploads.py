@@ -0,0 +1,183 @@
+import hashlib
+import os
+import tempfile
+
+from starlette.formparsers import MultiPartParser
+
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+# whole request bodies, enforced while they arrive; the slack covers the
+# multipart framing and form fields around a MAX_UPLOAD_BYTES file
+MAX_REQUEST_BYTES = int(os.environ.get("MAX_REQUEST_BYTES", str(MAX_UPLOAD_BYTES + 1024 * 1024)))
+# uploads above this size are spilled to a temp file instead of kept in memory
+UPLOAD_SPILL_BYTES = int(os.environ.get("UPLOAD_SPILL_BYTES", str(8 * 1024 * 1024)))
+CHUNK_SIZE = 256 * 1024
+
+# Starlette spools each multipart file over 1MB to an anonymous temp file,
+# which read_upload would read back only to copy into its own buffer or
+# spill file. Keep them in memory there instead (the request is capped by
+# RequestSizeLimit already), so an upload is written to disk at most once.
+MultiPartParser.spool_max_size = MAX_REQUEST_BYTES
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+class RequestSizeLimit:
+    """
+    ASGI middleware capping request bodies before anything is spooled: a
+    Content-Length over the limit is refused up front, and a body that grows
+    past it (chunked, or lying about its length) is cut off as it streams in.
+    Both get a 413. `limits` maps paths to their own cap, e.g. for batches.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES, limits: dict[str, int] | None = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limits = limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        max_bytes = self.limits.get(scope["path"], self.max_bytes)
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > max_bytes:
+                    await _too_large(max_bytes, scope, receive, send)
+                    return
+                break
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge(f"Request exceeds {max_bytes} bytes")
+            return message
+
+        async def guarded_send(message):
+            # whatever the app makes of the aborted body is replaced by the 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await _too_large(max_bytes, scope, receive, send)
+
+
+async def _too_large(max_bytes: int, scope, receive, send):
+    from common.responses import FastJSONResponse
+
+    response = FastJSONResponse(content={"error": f"Request exceeds {max_bytes} bytes"}, status_code=413,
+                                headers={"Connection": "close"})
+    await response(scope, receive, send)
+
+
+class BufferedUpload:
+    """
+    An upload held either as bytes in memory or, past the spill threshold,
+    in a temp file that is removed on close(). `source` is what gets handed
+    to pdfplumber (both forms are picklable for the parser pool).
+    """
+
+    def __init__(self):
+        self.data: bytes | None = None
+        self.path: str | None = None
+        self.size = 0
+        self.sha256 = ""
+
+    @property
+    def source(self):
+        return self.data if self.data is not None else self.path
+
+    def detach(self) -> "BufferedUpload":
+        """Move the buffer into a new object, e.g. one owned by a streaming response."""
+        other = BufferedUpload()
+        other.data, other.path, other.size, other.sha256 = self.data, self.path, self.size, self.sha256
+        self.data = self.path = None
+        return other
+
+    def close(self):
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+async def read_upload(file, max_bytes: int = MAX_UPLOAD_BYTES,
+                      spill_bytes: int = UPLOAD_SPILL_BYTES) -> BufferedUpload:
+    """Stream an UploadFile into a BufferedUpload, hashing and size-checking as it goes."""
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+
+    upload = BufferedUpload()
+    if file.size is not None and file.size <= spill_bytes:
+        # small and already in memory: take it in one piece
+        try:
+            upload.data = await file.read()
+        finally:
+            await file.close()
+        upload.size = len(upload.data)
+        if upload.size > max_bytes:
+            upload.close()
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        upload.sha256 = hashlib.sha256(upload.data).hexdigest()
+        return upload
+
+    digest = hashlib.sha256()
+    chunks: list[bytes] = []
+    spill = None
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            upload.size += len(chunk)
+            if upload.size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+            digest.update(chunk)
+
+            if spill is None and upload.size > spill_bytes:
+                fd, upload.path = tempfile.mkstemp(suffix=".pdf")
+                spill = os.fdopen(fd, "wb")
+                spill.writelines(chunks)
+                chunks = []
+            if spill is not None:
+                spill.write(chunk)
+            else:
+                chunks.append(chunk)
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            spill = None
+        upload.close()
+        raise
+    finally:
+        if spill is not None:
+            spill.close()
+        await file.close()
+
+    if upload.path is None:
+        upload.data = b"".join(chunks)
+    upload.sha256 = digest.hexdigest()
+    return upload
@@ -1,14 +1,142 @@
-from fastapi import FastAPI, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, Form, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-import tempfile
-import pandas as pd
-from parsers import get_parser
-from common.bank_detect import detect_bank
-from preview import preview_pdf
+from contextlib import asynccontextmanager
+import anyio
+import asyncio
+import os
+import re
+import time
+import zipfile
+from common import executor
+from common.batch import (
+    BATCH_MAX_FILES,
+    BATCH_MAX_REQUEST_BYTES,
+    BATCH_PARALLELISM,
+    TooManyFiles,
+    combine_summaries,
+    expand_zip,
+    is_zip,
+    parse_batch_options,
+)
+from common.cache import ParseCache, make_key
+from common.executor import ExecutorBusy
+from common.export import MEDIA_TYPES, ExportUnavailable, check_format, export_chunks
+from common.jobs import JOB_WORKERS, JobStore, run_cleanup, run_worker
+from common.ledger import Ledger, LedgerDisabled
+from common.responses import FastJSONResponse, result_shape, shape_result
+from common.scheduler import Scheduler
+from common.sessions import SessionExpired, SessionStore, SessionTooLarge, run_cleanup as run_session_cleanup
+from common.snapshots import StaleSnapshot
+from common.transactions import FIELDS, select_fields
+from common.metrics import collect, merge_worker, note, observe_request, render_prometheus, stage, timed_call
+from common.streaming import NDJSON_MEDIA_TYPE, ndjson_error, ndjson_from_result, wants_ndjson
+from common.uploads import MAX_REQUEST_BYTES, RequestSizeLimit, UploadTooLarge, read_upload
+from parsers import PARSER_VERSION_TAG, registered
+from preview import check_mode, parse_page_ranges
+from tasks import (
+    open_session,
+    parse_session as parse_session_document,
+    parse_statement,
+    preview_session as preview_session_document,
+    preview_statement,
+    reparse_snapshot,
+    stream_statement_to,
+)
+
+# behind a proxy every connection comes from the proxy: take the client
+# address from its headers instead (only when the proxy sets them itself)
+TRUST_PROXY_HEADERS = os.environ.get("TRUST_PROXY_HEADERS", "").strip().lower() in {"1", "true", "yes", "on"}
+
+parse_cache = ParseCache(PARSER_VERSION_TAG)
+# admission for every parse/preview, job workers included: concurrency,
+# memory budget in pages and fair ordering of whoever has to wait
+scheduler = Scheduler()
+# uploads kept between /documents/{id}/preview and /documents/{id}/parse,
+# their pages charged to the scheduler's budget while they live
+sessions = SessionStore(scheduler=scheduler)
+# per-account de-duplicated transactions (off unless LEDGER_DB is set)
+ledger = Ledger()
+job_store: JobStore | None = None
+
+
+async def _cache_get(key: str):
+    if parse_cache.directory is None:
+        return parse_cache.get(key)
+    return await run_in_threadpool(parse_cache.get, key)
+
+
+async def _cache_put(key: str, result: dict):
+    # the disk tier encodes and writes the result: keep that off the loop
+    if parse_cache.directory is None:
+        parse_cache.put(key, result)
+    else:
+        await run_in_threadpool(parse_cache.put, key, result)
+
+
+def _enabled(flag: str | None) -> bool:
+    return bool(flag) and flag.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _flow(request: Request) -> str:
+    """Fair-queuing flow of a request: one per client address."""
+    if TRUST_PROXY_HEADERS:
+        client = request.headers.get("fly-client-ip")
+        if client:
+            return client.strip()
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # the last hop is the one our proxy appended; anything before it is client-supplied
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else ""
+
 
-app = FastAPI(title="Statement Parser", version="0.5.0")
+async def _run_parse(source, password, bank):
+    """Parse on the pool; worker stage timings land in the active collector."""
+    started = time.perf_counter()
+    result, timings = await executor.run_job(timed_call, parse_statement, source, password, bank)
+    merge_worker(timings, time.perf_counter() - started)
+    return result
 
+
+async def _run_queued_job(job):
+    with collect() as timings:
+        started = time.perf_counter()
+        try:
+            async with scheduler.hold(job["input_path"], job["password"], flow=job["flow"] or "jobs"):
+                result = await _run_parse(job["input_path"], job["password"], job["bank"])
+        except ExecutorBusy:
+            return None  # back on the queue
+        observe_request(timings, "jobs", time.perf_counter() - started, cache="miss")
+    if not (isinstance(result, dict) and "error" in result):
+        await _cache_put(job["dedupe_key"], result)
+    return result
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global job_store
+    executor.start()
+    job_store = JobStore()
+    background = [asyncio.create_task(run_worker(job_store, _run_queued_job)) for _ in range(JOB_WORKERS)]
+    background.append(asyncio.create_task(run_cleanup(job_store)))
+    background.append(asyncio.create_task(run_session_cleanup(sessions)))
+    yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    sessions.close()
+    job_store.close()
+    ledger.close()
+    executor.shutdown()
+
+app = FastAPI(title="Statement Parser", version="0.5.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
+
+# inside CORS, so browsers can read the 413
+app.add_middleware(RequestSizeLimit, max_bytes=MAX_REQUEST_BYTES,
+                   limits={"/parse/batch": BATCH_MAX_REQUEST_BYTES})
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,36 +149,570 @@ app.add_middleware(
 def health():
     return {"status": "ok"}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return parse_cache.stats()
+
+@app.get("/sessions/stats")
+def sessions_stats():
+    return sessions.stats()
+
+@app.get("/scheduler/stats")
+def scheduler_stats():
+    """Queue depth, pages in flight and wait time, e.g. for autoscaling."""
+    return scheduler.stats()
+
+@app.get("/metrics")
+def metrics():
+    pool = executor.stats()
+    cache = parse_cache.stats()
+    admission = scheduler.stats()
+    open_sessions = sessions.stats()
+    gauges = {
+        "statement_executor_in_flight": pool["in_flight"],
+        "statement_executor_queued": pool["queued"],
+        "statement_cache_entries": cache["entries"],
+        "statement_cache_bytes": cache["bytes"],
+        "statement_admission_running": admission["running"],
+        "statement_admission_queued": admission["queued"],
+        "statement_admission_queued_pages": admission["queued_pages"],
+        "statement_admission_oldest_wait_seconds": admission["oldest_wait_seconds"],
+        "statement_admission_pages_in_use": admission["in_use_pages"],
+        "statement_admission_pages_capacity": admission["capacity_pages"],
+        "statement_sessions_open": open_sessions["open"],
+        "statement_sessions_pages": open_sessions["pages"],
+    }
+    counters = {
+        f"statement_cache_{name}_total": cache[name]
+        for name in ("memory_hits", "disk_hits", "misses", "evictions")
+    }
+    counters["statement_admission_admitted_total"] = admission["admitted"]
+    counters["statement_admission_rejected_total"] = admission["rejected"]
+    counters["statement_admission_wait_seconds_total"] = admission["wait_seconds_total"]
+    counters["statement_sessions_evicted_total"] = open_sessions["evicted"]
+    counters["statement_sessions_expired_total"] = open_sessions["expired"]
+    if job_store is not None:
+        for status, count in job_store.counts().items():
+            gauges[f"statement_jobs_{status}"] = count
+    return PlainTextResponse(render_prometheus(gauges, counters), media_type="text/plain; version=0.0.4")
+
 @app.post("/parse")
-async def parse(file: UploadFile, password: str = Form(default=None), bank: str = Form(default=None)):
+async def parse(request: Request, file: UploadFile, password: str = Form(default=None),
+                bank: str = Form(default=None), stream: str | None = None, timing: str | None = None,
+                fields: str | None = None, compact: str | None = None, offset: int = 0, limit: int | None = None,
+                export: str | None = Query(default=None, alias="format")):
+    """
+    `?fields=transaction_date,amount` keeps only those transaction fields,
+    `?compact=1` drops the per-row bank/card_type and `?offset=&limit=` page
+    through the transactions (the summary always covers the whole statement).
+    `?format=csv|xlsx|parquet` downloads the transactions as a file instead.
+    `?timing=1` adds a Server-Timing header with the per-stage breakdown.
+    """
+    try:
+        shape = result_shape(fields, _enabled(compact), offset, limit)
+        export = check_format(export) if export else None
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+    except ExportUnavailable as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=501)
+    with collect() as timings:
+        started = time.perf_counter()
+        response = await _parse(request, file, password, bank, stream, shape, export)
+        observe_request(timings, "parse", time.perf_counter() - started,
+                        cache=response.headers.get("x-cache", ""), upload_bytes=timings.info.get("upload_bytes"))
+        if _enabled(timing):
+            response.headers["Server-Timing"] = timings.server_timing()
+        return response
+
+
+async def _parse(request, file, password, bank, stream, shape, export):
+    as_ndjson = not export and wants_ndjson(request.headers.get("accept"), stream)
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            contents = await file.read()
-            tmp.write(contents)
-            pdf_path = tmp.name
+        with stage("upload"):
+            upload = await read_upload(file)
+        note("upload_bytes", upload.size)
+        with upload:
+            cache_key = make_key(upload.sha256, bank, password, PARSER_VERSION_TAG)
+            with stage("cache"):
+                cached = await _cache_get(cache_key)
+            if cached is not None:
+                note("bank", registered(cached.get("bank")) or "unknown")
+                return _finished_response(cached, shape, export, as_ndjson, "hit", file.filename)
+
+            if as_ndjson:
+                return await _stream_parse(upload, password, bank, _row_fields(shape), _flow(request))
 
-        bank_guess = bank or (detect_bank(pdf_path, password) or "unknown")
-        parser = get_parser(bank_guess)
-        result = parser(pdf_path, password)
+            async with scheduler.hold(upload.source, password, _flow(request)):
+                result = await _run_parse(upload.source, password, bank)
 
         if isinstance(result, dict) and "error" in result:
-            return JSONResponse(content=result, status_code=400)
+            return FastJSONResponse(content=result, status_code=400)
 
-        return JSONResponse(content= result)
+        await _cache_put(cache_key, result)
+        return _result_response(result, shape, export, "miss", file.filename)
 
+    except UploadTooLarge as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=413)
+    except ExecutorBusy as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
+
+
+def _finished_response(result, shape, export, as_ndjson, cache_state, filename):
+    """Response for a result that is already complete (cached, or parsed in a session)."""
+    if as_ndjson:
+        return StreamingResponse(ndjson_from_result(result, _row_fields(shape)),
+                                 media_type=NDJSON_MEDIA_TYPE, headers={"X-Cache": cache_state})
+    return _result_response(result, shape, export, cache_state, filename)
+
+
+def _result_response(result, shape, export, cache_state, filename):
+    if export:
+        return _export_response(result, export, shape, cache_state, filename)
+    with stage("encode"):
+        return FastJSONResponse(content=shape_result(result, shape), headers={"X-Cache": cache_state})
+
+
+def _export_response(result, export, shape, cache_state, filename):
+    # rows are written while the body streams (on the threadpool), never all at once
+    fields, offset, limit = (shape["fields"], shape["offset"], shape["limit"]) if shape else (FIELDS, 0, None)
+    stem = re.sub(r"[^A-Za-z0-9._-]+", "_", os.path.splitext(os.path.basename(filename or ""))[0]) or "statement"
+    return StreamingResponse(
+        export_chunks(result, export, fields, offset, limit),
+        media_type=MEDIA_TYPES[export],
+        headers={"X-Cache": cache_state, "Content-Disposition": f'attachment; filename="{stem}.{export}"'},
+    )
+
+
+def _row_fields(shape: dict | None):
+    # NDJSON rows honour the field projection; pagination only applies to JSON
+    return shape["fields"] if shape else None
+
+
+async def _stream_parse(upload, password, bank, fields=None, flow=""):
+    # the document stays open while the body streams: hold its slot until then
+    pages = await scheduler.admit(upload.source, password, flow)
+    # the response now owns the buffer: keep it alive until the body is sent
+    owned = upload.detach()
+    chunks = executor.stream_job(stream_statement_to, owned.source, password, bank, fields)
+    try:
+        # the worker reports the open first, so a bad password is still a plain 400
+        opened = await anext(chunks)
+    except BaseException:
+        await _end_stream(chunks, pages, owned)
+        raise
+    if isinstance(opened, dict):
+        await _end_stream(chunks, pages, owned)
+        return FastJSONResponse(content=opened, status_code=400)
+
+    async def body():
+        # released here rather than in a BackgroundTask, which only runs after
+        # a complete send: a client going away mid-stream must free its slot too
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            yield ndjson_error(str(e))
+        finally:
+            with anyio.CancelScope(shield=True):
+                await _end_stream(chunks, pages, owned)
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers={"X-Cache": "miss"})
+
+
+async def _end_stream(chunks, pages, owned):
+    scheduler.release(pages)
+    try:
+        await chunks.aclose()  # tells the worker to stop if it hasn't finished
+    finally:
+        owned.close()
 
 
 @app.post("/preview")
-async def preview(file: UploadFile, password: str = Form(default=None)):
+async def preview(request: Request, file: UploadFile, password: str = Form(default=None),
+                  pages: str | None = None, mode: str = "both"):
+    """
+    `?pages=1-3` (also `2,5-`) previews only those pages and
+    `?mode=text|tables|both` picks what is extracted from each.
+    """
+    try:
+        page_ranges = parse_page_ranges(pages)
+        mode = check_mode(mode)
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+    try:
+        with await read_upload(file) as upload:
+            async with scheduler.hold(upload.source, password, _flow(request)):
+                result = await executor.run_job(preview_statement, upload.source, password, page_ranges, mode)
+        return FastJSONResponse(content=result)
+    except UploadTooLarge as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=413)
+    except ExecutorBusy as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
+    except Exception as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+
+
+def _session_gone(document_id):
+    return FastJSONResponse(content={"error": f"Document {document_id} not found or expired"}, status_code=404)
+
+
+@app.post("/documents", status_code=201)
+async def create_document(request: Request, file: UploadFile, password: str = Form(default=None)):
+    """
+    Upload (and decrypt) a statement once for `/documents/{id}/preview` and
+    `/documents/{id}/parse`. The upload (and any page text extracted from it)
+    is kept until it has gone unused for DOCUMENT_SESSION_TTL_SECONDS or is
+    evicted for newer ones; its pages count against the parse memory budget.
+    """
+    try:
+        with await read_upload(file) as upload:
+            async with scheduler.hold(upload.source, password, _flow(request)):
+                opened = await executor.run_job(open_session, upload.source, password)
+            if "error" in opened:
+                return FastJSONResponse(content=opened, status_code=400)
+            session = sessions.add(upload.detach(), password, opened["page_count"], file.filename)
+    except (UploadTooLarge, SessionTooLarge) as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=413)
+    except ExecutorBusy as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
+    except Exception as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
+
+    return FastJSONResponse(
+        content={"document_id": session.id, "page_count": session.pages, "expires_in": sessions.ttl},
+        status_code=201,
+        headers={"Location": f"/documents/{session.id}"},
+    )
+
+
+@app.delete("/documents/{document_id}", status_code=204)
+def delete_document(document_id: str):
+    if not sessions.delete(document_id):
+        return _session_gone(document_id)
+    return PlainTextResponse(status_code=204)
+
+
+@app.post("/documents/{document_id}/preview")
+async def preview_session(request: Request, document_id: str, pages: str | None = None, mode: str = "both"):
+    """/preview of an uploaded document; `pages` and `mode` as there."""
+    try:
+        page_ranges = parse_page_ranges(pages)
+        mode = check_mode(mode)
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+    session = sessions.get(document_id)
+    if session is None:
+        return _session_gone(document_id)
+    try:
+        async with scheduler.hold(None, flow=_flow(request), pages=session.pages):
+            result = await session.run(preview_session_document, page_ranges, mode)
+        return FastJSONResponse(content=result)
+    except SessionExpired:
+        return _session_gone(document_id)
+    except ExecutorBusy as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
+    except Exception as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+
+
+@app.post("/documents/{document_id}/parse")
+async def parse_session(request: Request, document_id: str, bank: str = Form(default=None),
+                        stream: str | None = None, timing: str | None = None,
+                        fields: str | None = None, compact: str | None = None, offset: int = 0,
+                        limit: int | None = None, export: str | None = Query(default=None, alias="format")):
+    """
+    /parse of an uploaded document, reusing its upload and any page text a
+    preview already extracted. Takes the same options as /parse; results are
+    cached under the same key, so either endpoint can answer for the other.
+    """
+    try:
+        shape = result_shape(fields, _enabled(compact), offset, limit)
+        export = check_format(export) if export else None
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+    except ExportUnavailable as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=501)
+    session = sessions.get(document_id)
+    if session is None:
+        return _session_gone(document_id)
+    with collect() as timings:
+        started = time.perf_counter()
+        response = await _parse_session(request, session, bank, stream, shape, export)
+        observe_request(timings, "documents", time.perf_counter() - started,
+                        cache=response.headers.get("x-cache", ""))
+        if _enabled(timing):
+            response.headers["Server-Timing"] = timings.server_timing()
+        return response
+
+
+async def _parse_session(request, session, bank, stream, shape, export):
+    as_ndjson = not export and wants_ndjson(request.headers.get("accept"), stream)
+    cache_key = make_key(session.sha256, bank, session.password, PARSER_VERSION_TAG)
+    with stage("cache"):
+        cached = await _cache_get(cache_key)
+    if cached is not None:
+        note("bank", registered(cached.get("bank")) or "unknown")
+        return _finished_response(cached, shape, export, as_ndjson, "hit", session.filename)
+
+    try:
+        async with scheduler.hold(None, flow=_flow(request), pages=session.pages):
+            started = time.perf_counter()
+            result, worker_timings = await session.run(parse_session_document, bank)
+            merge_worker(worker_timings, time.perf_counter() - started)
+    except SessionExpired:
+        return _session_gone(session.id)
+    except ExecutorBusy as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
+    except Exception as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
+
+    if isinstance(result, dict) and "error" in result:
+        return FastJSONResponse(content=result, status_code=400)
+    await _cache_put(cache_key, result)
+    return _finished_response(result, shape, export, as_ndjson, "miss", session.filename)
+
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+@app.post("/snapshots/{sha256}/parse")
+async def parse_from_snapshot(sha256: str, password: str = Form(default=None), bank: str = Form(default=None),
+                              fields: str | None = None, compact: str | None = None, offset: int = 0,
+                              limit: int | None = None, export: str | None = Query(default=None, alias="format")):
+    """
+    Re-parse a statement parsed before (with SNAPSHOT_DIR set) from its saved
+    page text, by the sha256 of the PDF: no upload and no PDF extraction, so
+    a parser fix can be applied to it cheaply. Takes the password it was
+    parsed with, and the shaping/`format` options of /parse.
+    """
+    sha256 = sha256.lower()
+    if not _SHA256_RE.match(sha256):
+        return FastJSONResponse(content={"error": "Expected the document's sha256 as 64 hex digits"}, status_code=400)
+    try:
+        shape = result_shape(fields, _enabled(compact), offset, limit)
+        export = check_format(export) if export else None
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+    except ExportUnavailable as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=501)
+    try:
+        result = await executor.run_job(reparse_snapshot, sha256, password, bank)
+    except StaleSnapshot as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=409)
+    except ExecutorBusy as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
+    except Exception as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
+    if result is None:
+        return FastJSONResponse(content={"error": f"No snapshot of {sha256}"}, status_code=404)
+    if isinstance(result, dict) and "error" in result:
+        return FastJSONResponse(content=result, status_code=400)
+    return _result_response(result, shape, export, "miss", sha256[:16])
+
+
+async def _parse_batch_item(name, upload, password, bank, limit, flow=""):
+    key = make_key(upload.sha256, bank, password, PARSER_VERSION_TAG)
+    cached = await _cache_get(key)
+    if cached is not None:
+        return {"filename": name, "status": "ok", "cache": "hit", "result": cached}
+
+    async with limit:
+        # gather() runs each item in its own context, so this collector is per file
+        with collect() as timings:
+            started = time.perf_counter()
+            try:
+                async with scheduler.hold(upload.source, password, flow):
+                    result = await _run_parse(upload.source, password, bank)
+            except Exception as e:
+                return {"filename": name, "status": "error", "error": str(e)}
+            observe_request(timings, "batch", time.perf_counter() - started, cache="miss",
+                            upload_bytes=upload.size)
+
+    if isinstance(result, dict) and "error" in result:
+        return {"filename": name, "status": "error", "error": result["error"]}
+    await _cache_put(key, result)
+    return {"filename": name, "status": "ok", "cache": "miss", "result": result}
+
+
+@app.post("/parse/batch")
+async def parse_batch(request: Request, files: list[UploadFile], password: str = Form(default=None),
+                      bank: str = Form(default=None), options: str = Form(default=None),
+                      fields: str | None = None, compact: str | None = None,
+                      offset: int = 0, limit: int | None = None):
+    """
+    Parse several statements (PDFs and/or zips of PDFs) in one request.
+    `password`/`bank` apply to every file unless overridden per file in `options`.
+    A failing file is reported in its own entry and does not abort the batch;
+    entries come back in upload order, a zip's members in its place.
+    `fields`/`compact`/`offset`/`limit` shape each file's transactions as in /parse.
+    """
+    try:
+        shape = result_shape(fields, _enabled(compact), offset, limit)
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            contents = await file.read()
-            tmp.write(contents)
-            pdf_path = tmp.name
+        per_file = parse_batch_options(options)
+    except ValueError as e:
+        return FastJSONResponse(content={"error": f"Invalid options: {e}"}, status_code=400)
+
+    # in upload order: (name, BufferedUpload) to parse, or the error entry of
+    # a file that failed while being read
+    entries = []
+    try:
+        for f in files:
+            if len(entries) >= BATCH_MAX_FILES:
+                raise TooManyFiles(f"Batch exceeds {BATCH_MAX_FILES} files")
+            try:
+                upload = await read_upload(f)
+            except UploadTooLarge as e:
+                entries.append({"filename": f.filename, "status": "error", "error": str(e)})
+                continue
+            if is_zip(f.filename, upload):
+                with upload:
+                    try:
+                        for name, member, error in expand_zip(upload, BATCH_MAX_FILES - len(entries)):
+                            if error is None:
+                                entries.append((name, member))
+                            else:
+                                entries.append({"filename": name, "status": "error", "error": error})
+                    except (UploadTooLarge, zipfile.BadZipFile) as e:
+                        entries.append({"filename": f.filename, "status": "error", "error": str(e)})
+            else:
+                entries.append((f.filename, upload))
+
+        limit = asyncio.Semaphore(BATCH_PARALLELISM)
+        jobs = []
+        for entry in entries:
+            if isinstance(entry, tuple):
+                name, upload = entry
+                opts = per_file.get(name, {})
+                jobs.append(_parse_batch_item(
+                    name, upload, opts.get("password", password), opts.get("bank", bank), limit, _flow(request)
+                ))
+        parsed = iter(await asyncio.gather(*jobs))
+        results = [next(parsed) if isinstance(entry, tuple) else entry for entry in entries]
+    except TooManyFiles as e:
+        # checked before each file is read, and a zip's members before any is unpacked
+        return FastJSONResponse(content={"error": str(e)}, status_code=413)
+    finally:
+        for entry in entries:
+            if isinstance(entry, tuple):
+                entry[1].close()
 
-        result = preview_pdf(pdf_path, password)
-        return JSONResponse(content=result)
+    summary = combine_summaries(results)
+    if shape is not None:
+        results = [{**r, "result": shape_result(r["result"], shape)} if "result" in r else r for r in results]
+    return FastJSONResponse(content={"files": results, "summary": summary})
+
+
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+@app.post("/ledger/{account}/statements")
+async def ingest_statement(request: Request, account: str, file: UploadFile, password: str = Form(default=None),
+                           bank: str = Form(default=None)):
+    """
+    Parse a statement (or take it from the cache) and add its transactions to
+    `account`'s ledger. Transactions already there from an overlapping
+    statement are skipped; a file already ingested is not parsed again.
+    """
+    if not ledger.enabled:
+        return FastJSONResponse(content={"error": "The ledger is not enabled; set LEDGER_DB"}, status_code=501)
+    try:
+        with await read_upload(file) as upload:
+            known = await run_in_threadpool(ledger.ingested, account, upload.sha256)
+            if known is not None:
+                return FastJSONResponse(content=known)
+            cache_key = make_key(upload.sha256, bank, password, PARSER_VERSION_TAG)
+            result = await _cache_get(cache_key)
+            if result is None:
+                async with scheduler.hold(upload.source, password, _flow(request)):
+                    result = await _run_parse(upload.source, password, bank)
+                if isinstance(result, dict) and "error" in result:
+                    return FastJSONResponse(content=result, status_code=400)
+                await _cache_put(cache_key, result)
+            outcome = await run_in_threadpool(ledger.ingest, account, upload.sha256, result)
+    except UploadTooLarge as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=413)
+    except ExecutorBusy as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=400)
\ No newline at end of file
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
+
+    return FastJSONResponse(content=outcome)
+
+
+@app.get("/ledger/{account}/transactions")
+async def ledger_transactions(account: str, date_from: str | None = Query(default=None, alias="from"),
+                              date_to: str | None = Query(default=None, alias="to"), fields: str | None = None,
+                              compact: str | None = None, offset: int = 0, limit: int | None = None):
+    """
+    `?from=2025-01-01&to=2025-03-31` (ISO dates, both inclusive and optional)
+    from the account's ledger, oldest first; `fields`/`compact`/`offset`/`limit`
+    as in /parse. Served from the ledger's indexes, no PDF is read.
+    """
+    for value in (date_from, date_to):
+        if value and not _ISO_DATE_RE.match(value):
+            return FastJSONResponse(content={"error": f"Invalid date: {value!r}. Use YYYY-MM-DD"}, status_code=400)
+    if offset < 0 or (limit is not None and limit < 0):
+        return FastJSONResponse(content={"error": "offset and limit must not be negative"}, status_code=400)
+    try:
+        selected = select_fields(fields, _enabled(compact))
+        result = await run_in_threadpool(ledger.transactions, account, date_from, date_to, selected, offset, limit)
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+    except LedgerDisabled as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=501)
+    return FastJSONResponse(content=result)
+
+
+@app.get("/ledger/{account}/statements")
+async def ledger_statements(account: str):
+    try:
+        statements = await run_in_threadpool(ledger.statements, account)
+    except LedgerDisabled as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=501)
+    return FastJSONResponse(content={"account": account, "statements": statements})
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: Request, file: UploadFile, password: str = Form(default=None),
+                     bank: str = Form(default=None)):
+    """Queue a parse and return immediately; poll GET /jobs/{job_id} for the result."""
+    try:
+        with await read_upload(file) as upload:
+            key = make_key(upload.sha256, bank, password, PARSER_VERSION_TAG)
+            job = await run_in_threadpool(job_store.find_reusable, key)
+            if job is None:
+                cached = await _cache_get(key)
+                if cached is not None:
+                    job = await run_in_threadpool(job_store.submit_finished, key, cached)
+                else:
+                    job = await run_in_threadpool(job_store.submit, key, upload.source, password, bank,
+                                                  _flow(request))
+    except UploadTooLarge as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=413)
+
+    return FastJSONResponse(
+        content={"job_id": job["job_id"], "status": job["status"]},
+        status_code=202,
+        headers={"Location": f"/jobs/{job['job_id']}"},
+    )
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, fields: str | None = None, compact: str | None = None,
+            offset: int = 0, limit: int | None = None):
+    """`fields`/`compact`/`offset`/`limit` shape a finished job's transactions as in /parse."""
+    try:
+        shape = result_shape(fields, _enabled(compact), offset, limit)
+    except ValueError as e:
+        return FastJSONResponse(content={"error": str(e)}, status_code=400)
+    job = job_store.get(job_id)
+    if job is None:
+        return FastJSONResponse(content={"error": "Job not found"}, status_code=404)
+    if "result" in job:
+        job["result"] = shape_result(job["result"], shape)
+    return job
@@ -1,21 +1,68 @@
-from .mashreq import parse_mashreq
-from .enbd import parse_enbd
-from .emiratesislamic import parse_emiratesislamic
-from .rakbank import parse_rakbank
-from .generic import parse_generic
-# from .adcb import parse_adcb  # add later
+import importlib
+
+from common.engines import engine_signature
+from common.layouts import layout_signature
+
+# Bank parsers by key. Each module provides parse_<key>(source, password) and
+# iter_<key>(doc, meta) and is only imported the first time it is asked for.
+# Bump "version" whenever a parser's output changes: it is part of the cache
+# key, and keeping it here means the tag is known without importing anything.
+PARSERS: dict[str, dict] = {}
+DEFAULT_PARSER = "generic"
+
+_aliases: dict[str, str] = {}
+_modules: dict[str, object] = {}
+
+
+def _normalize(bank: str | None) -> str:
+    return (bank or "").strip().lower()
+
+
+def register(key: str, module: str, version: str = "1", aliases=()):
+    """Register a bank parser module under `key` and any number of aliases."""
+    PARSERS[key] = {"module": module, "version": version, "aliases": tuple(aliases)}
+    for name in (key, *aliases):
+        _aliases[_normalize(name)] = key
+    _modules.pop(key, None)
+
+
+register("mashreq", "parsers.mashreq", version="1")
+register("enbd", "parsers.enbd", version="2")
+register("emiratesislamic", "parsers.emiratesislamic", version="2", aliases=("emirates islamic",))
+register("rakbank", "parsers.rakbank", version="2")
+register("generic", "parsers.generic", version="1")
+# register("adcb", "parsers.adcb")  # add later
+
+# combined tag used to key cached parse results; the engine and cropping
+# setup are part of it so changing them never serves text extracted otherwise
+PARSER_VERSION_TAG = ",".join(
+    f"{key}={spec['version']}" for key, spec in PARSERS.items()
+) + ";" + engine_signature() + ";" + layout_signature()
+
+
+def resolve(bank: str | None) -> str:
+    """Registry key for a bank name or alias; unknown banks get the generic parser."""
+    return _aliases.get(_normalize(bank), DEFAULT_PARSER)
+
+
+def registered(bank: str | None) -> str | None:
+    """Registry key for a bank name or alias, or None when no parser is registered for it."""
+    return _aliases.get(_normalize(bank))
+
+
+def _module(key: str):
+    module = _modules.get(key)
+    if module is None:
+        module = _modules[key] = importlib.import_module(PARSERS[key]["module"])
+    return module
+
 
 def get_parser(bank: str):
-    bank = (bank or "").lower()
-    if bank == "mashreq":
-        return parse_mashreq
-    elif bank == "enbd":
-        return parse_enbd
-    elif bank in {"emiratesislamic", "emirates islamic"}:
-        return parse_emiratesislamic
-    elif bank == "rakbank":
-        return parse_rakbank
-    # elif bank == "adcb":
-    #     return parse_adcb
-    else:
-        return parse_generic   # fallback
+    key = resolve(bank)
+    return getattr(_module(key), f"parse_{key}")
+
+
+def get_iterator(bank: str):
+    """Streaming counterpart of get_parser: returns iter_<bank>(doc, meta)."""
+    key = resolve(bank)
+    return getattr(_module(key), f"iter_{key}")
@@ -1,6 +1,9 @@
 import re
-import datetime
-from common.pdf_utils import open_pdf_safe, normalize_transactions, summarize_transactions, normalize_date
+from common.pdf_utils import summarize_transactions
+from common.dates import DateResolver, parse_date
+from common.document import open_statement
+from common.layouts import layout_for
+from common.transactions import TransactionBatch
 
 BANK_NAME = "Emirates Islamic"
 CARD_TYPE = "credit"
@@ -45,96 +48,83 @@ def _strip_ordinal(s: str) -> str:
 def _parse_full_date(s: str) -> str | None:
     # Accepts "11th Jul 2025" or "11 Jul 2025" etc. Returns ISO date string.
     s_clean = _strip_ordinal(s)
-    for fmt in ("%d %b %Y", "%d %B %Y"):
-        try:
-            dt = datetime.datetime.strptime(s_clean, fmt).date()
-            return dt.isoformat()
-        except ValueError:
-            continue
-    return None
-
-def parse_emiratesislamic(file_path: str, password: str | None = None):
-    transactions = []
+    return parse_date(s_clean, "%d %b %Y") or parse_date(s_clean, "%d %B %Y") or None
+
+def iter_emiratesislamic(doc, meta: dict):
+    """Yield normalized Emirates Islamic transactions page by page; fills `meta` with bank and period."""
+    meta.update(bank=BANK_NAME, card_type=CARD_TYPE, from_date=None, to_date=None)
+    # later pages are read from the transaction table only
+    doc.use_layout(layout_for("emiratesislamic"))
     statement_from = None
     statement_to = None
-
-    pdf = open_pdf_safe(file_path, password)
-    if isinstance(pdf, dict) and "error" in pdf:
-        return pdf  # error dict
-
-    with pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for line in text.splitlines():
-                raw = line.strip()
-                if not raw:
-                    continue
-
-                low = raw.lower()
-                if any(k in low for k in SKIP_KEYWORDS):
-                    continue
-
-                # Look for From / To lines (e.g. "From:11th Jul 2025")
-                m_range = FROM_TO_REGEX.match(raw)
-                if m_range:
-                    which, date_str = m_range.groups()
-                    parsed = _parse_full_date(date_str)
-                    if parsed:
-                        if which.lower() == "from":
-                            statement_from = parsed
-                        else:
-                            statement_to = parsed
-                    continue
-
-                m = LINE_REGEX.match(raw)
-                if not m:
-                    continue
-
-                _, txn_date_raw, desc, amt_raw, cr = m.groups()
-                amt_val = clean_amount(amt_raw)
-
-                debit, credit = 0.0, 0.0
-                if cr or "payment received" in desc.lower():
-                    credit = amt_val
-                else:
-                    debit = amt_val
-
-                # Parse transaction date with just month and day
-                txn_date = normalize_date(txn_date_raw.strip(), "%d %b")
-                
-                # If we have from_date and to_date, determine the correct year
-                if statement_from and statement_to:
-                    from_year = int(statement_from[:4])
-                    to_year = int(statement_to[:4])
-                    
-                    # Convert string date to datetime object for comparison
-                    txn_dt = datetime.datetime.strptime(txn_date, "%Y-%m-%d").replace(year=to_year)
-                    
-                    # If the month is in the first few months of the statement and to_date is in the later months,
-                    # it likely means the transaction is from the previous year
-                    statement_to_dt = datetime.datetime.strptime(statement_to, "%Y-%m-%d")
-                    if statement_to_dt.month < 6 and txn_dt.month > 6:
-                        txn_date = txn_dt.replace(year=from_year).strftime("%Y-%m-%d")
+    dates = DateResolver("%d %b")
+
+    for text in doc.iter_page_texts():
+        for line in text.splitlines():
+            raw = line.strip()
+            if not raw:
+                continue
+
+            low = raw.lower()
+            if any(k in low for k in SKIP_KEYWORDS):
+                continue
+
+            # Look for From / To lines (e.g. "From:11th Jul 2025")
+            m_range = FROM_TO_REGEX.match(raw)
+            if m_range:
+                which, date_str = m_range.groups()
+                parsed = _parse_full_date(date_str)
+                if parsed:
+                    if which.lower() == "from":
+                        statement_from = parsed
                     else:
-                        txn_date = txn_dt.strftime("%Y-%m-%d")
-                
-                transactions.append({
-                    "transaction_date": txn_date,
-                    "description": desc.strip(),
-                    "debit": debit,
-                    "credit": credit,
-                    "amount": amt_val,
-                    "bank": BANK_NAME,
-                    "card_type": CARD_TYPE,
-                })
-
-    normalized = normalize_transactions(transactions, BANK_NAME, CARD_TYPE)
+                        statement_to = parsed
+                    meta.update(from_date=statement_from, to_date=statement_to)
+                    dates.set_period(statement_from, statement_to)
+                continue
+
+            m = LINE_REGEX.match(raw)
+            if not m:
+                continue
+
+            _, txn_date_raw, desc, amt_raw, cr = m.groups()
+            amt_val = clean_amount(amt_raw)
+
+            debit, credit = 0.0, 0.0
+            if cr or "payment received" in desc.lower():
+                credit = amt_val
+            else:
+                debit = amt_val
+
+            # day and month only; the year comes from the statement period
+            txn_date = dates.iso(txn_date_raw.strip())
+
+            yield {
+                "transaction_date": txn_date,
+                "description": desc.strip(),
+                "debit": debit,
+                "credit": credit,
+                "amount": amt_val,
+                "bank": BANK_NAME,
+                "card_type": CARD_TYPE,
+            }
+
+
+def parse_emiratesislamic(source, password: str | None = None):
+    doc = open_statement(source, password)
+    if isinstance(doc, dict) and "error" in doc:
+        return doc  # error dict
+
+    meta = {}
+    with doc:
+        transactions = TransactionBatch(BANK_NAME, CARD_TYPE).extend(iter_emiratesislamic(doc, meta))
+
     result = {
         "bank": BANK_NAME,
         "card_type": CARD_TYPE,
-        "summary": summarize_transactions(normalized),
-        "transactions": normalized,
-        "from_date": statement_from,
-        "to_date": statement_to,
+        "summary": summarize_transactions(transactions),
+        "transactions": transactions,
+        "from_date": meta["from_date"],
+        "to_date": meta["to_date"],
     }
     return result
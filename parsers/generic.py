@@ -1,56 +1,62 @@
-from common.pdf_utils import open_pdf_safe, normalize_transactions, normalize_date, summarize_transactions
+from common.pdf_utils import normalize_transaction, summarize_transactions
+from common.dates import DateResolver
+from common.document import open_statement
+from common.transactions import TransactionBatch
 
 BANK_NAME = "unknown"
 CARD_TYPE = "debit"
 
-def parse_generic(file_path: str, password: str | None = None):
+def iter_generic(doc, meta: dict):
+    """Yield a normalized row for every line containing digits; fills `meta` with bank info."""
+    meta.update(bank=BANK_NAME, card_type=CARD_TYPE, from_date=None, to_date=None)
+    # no known format: the first token that parses as a date fixes the order
+    dates = DateResolver()
+
+    for text in doc.iter_page_texts():
+        if not text:
+            continue
+
+        for line in text.splitlines():
+            raw = line.strip()
+            if not raw:
+                continue
+
+            # crude filter: lines that contain any number
+            if any(c.isdigit() for c in raw):
+                # try to normalize a date if one appears at start
+                parts = raw.split(maxsplit=1)
+                possible_date = parts[0] if parts else ""
+                normalized_date = dates.iso(possible_date)
+
+                yield normalize_transaction({
+                    "transaction_date": normalized_date,
+                    "description": raw,
+                    "debit": 0.0,
+                    "credit": 0.0,
+                    "amount": 0.0,
+                    "balance": None,
+                }, BANK_NAME, CARD_TYPE)
+
+
+def parse_generic(source, password: str | None = None):
     """
     Generic fallback parser:
     Extracts raw lines containing digits (crude heuristic).
     Normalizes structure to match other bank parsers.
     """
-    transactions = []
-    statement_from = None
-    statement_to = None
-    pdf = open_pdf_safe(file_path, password)
-    if isinstance(pdf, dict) and "error" in pdf:
-        return pdf
-
-    with pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if not text:
-                continue
+    doc = open_statement(source, password)
+    if isinstance(doc, dict) and "error" in doc:
+        return doc
+
+    meta = {}
+    with doc:
+        transactions = TransactionBatch(BANK_NAME, CARD_TYPE).extend(iter_generic(doc, meta))
 
-            for line in text.splitlines():
-                raw = line.strip()
-                if not raw:
-                    continue
-
-                # crude filter: lines that contain any number
-                if any(c.isdigit() for c in raw):
-                    # try to normalize a date if one appears at start
-                    parts = raw.split(maxsplit=1)
-                    possible_date = parts[0] if parts else ""
-                    normalized_date = normalize_date(possible_date)
-
-                    transactions.append({
-                        "transaction_date": normalized_date,
-                        "description": raw,
-                        "debit": 0.0,
-                        "credit": 0.0,
-                        "amount": 0.0,
-                        "balance": None,
-                        "bank": BANK_NAME,
-                        "card_type": CARD_TYPE,
-                    })
-
-    normalized = normalize_transactions(transactions, BANK_NAME, CARD_TYPE)
     return {
         "bank": BANK_NAME,
         "card_type": CARD_TYPE,
-        "summary": summarize_transactions(normalized),
-        "transactions": normalized,
-        "from_date": statement_from,
-        "to_date": statement_to,
+        "summary": summarize_transactions(transactions),
+        "transactions": transactions,
+        "from_date": meta["from_date"],
+        "to_date": meta["to_date"],
     }
@@ -1,6 +1,10 @@
 import re
 import datetime
-from common.pdf_utils import open_pdf_safe, normalize_transactions, summarize_transactions, normalize_date
+from common.pdf_utils import normalize_transaction, summarize_transactions, normalize_date
+from common.dates import DateResolver
+from common.document import open_statement
+from common.layouts import layout_for
+from common.transactions import TransactionBatch
 
 BANK_NAME = "RAKBANK"
 CARD_TYPE = "credit"
@@ -41,109 +45,115 @@ def clean_amount(val: str | None) -> float:
         return 0.0
     return float(val.replace(",", "").replace("CR", "").replace("Cr", "").strip())
 
-def parse_rakbank(file_path: str, password: str | None = None):
-    transactions = []
+def iter_rakbank(doc, meta: dict):
+    """Yield normalized RAKBANK transactions page by page; fills `meta` with bank and period."""
+    meta.update(bank=BANK_NAME, card_type=CARD_TYPE, from_date=None, to_date=None)
+    # later pages are read from the transaction table only
+    doc.use_layout(layout_for("rakbank"))
     statement_from = None
     statement_to = None
-    pdf = open_pdf_safe(file_path, password)
-    if isinstance(pdf, dict) and "error" in pdf:
-        return pdf  # error dict
-
-    with pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-
-            buffer_desc = []
-
-            for raw in lines:
-                low = raw.lower()
-                if any(k in low for k in SKIP_KEYWORDS):
-                    continue
-
-                # detect statement period lines like 'Statement Period: 15/08/2025 TO 14/09/2025'
-                if "statement period" in low:
-                    m = STATEMENT_PERIOD_RE.search(raw)
-                    if m:
-                        fd, td = m.groups()
-                        statement_from = normalize_date(fd.replace(" ", ""), "%d/%m/%Y")
-                        statement_to = normalize_date(td.replace(" ", ""), "%d/%m/%Y")
-                    continue
-
-                # --------- AED transaction ----------
-                m = RAKBANK_LINE_REGEX.match(raw)
+    dates = DateResolver("%d/%m/%Y")
+
+    for text in doc.iter_page_texts():
+        lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+
+        buffer_desc = []
+
+        for raw in lines:
+            low = raw.lower()
+            if any(k in low for k in SKIP_KEYWORDS):
+                continue
+
+            # detect statement period lines like 'Statement Period: 15/08/2025 TO 14/09/2025'
+            if "statement period" in low:
+                m = STATEMENT_PERIOD_RE.search(raw)
                 if m:
-                    date, desc, amt_raw, balance_raw = m.groups()
-                    if any(h in " ".join(buffer_desc).lower() for h in DROP_HINTS):
-                        buffer_desc = []
-
-                    full_desc = " ".join(buffer_desc + [desc.strip()]).strip()
-                    buffer_desc = []  # clear
-
-                    amt_val = clean_amount(amt_raw)
-                    balance_val = clean_amount(balance_raw)
-
-                    debit, credit = 0.0, 0.0
-                    if "cr" in raw.lower() or "payment" in full_desc.lower() or "refund" in full_desc.lower():
-                        credit = amt_val
-                    else:
-                        debit = amt_val
-
-                    transactions.append({
-                        "transaction_date": normalize_date(date, "%d/%m/%Y"),
-                        "description": full_desc,
-                        "debit": debit,
-                        "credit": credit,
-                        "amount": amt_val,
-                        "balance": balance_val,
-                        "bank": BANK_NAME,
-                        "card_type": CARD_TYPE,
-                    })
-                    continue
-
-                # --------- FX transaction ----------
-                mfx = RAKBANK_FX_REGEX.match(raw)
-                if mfx:
-                    date, ccy, fx_amt, fx_rate, aed_amt, cr_flag = mfx.groups()
-                    if any(h in " ".join(buffer_desc).lower() for h in DROP_HINTS):
-                        buffer_desc = []
-
-                    full_desc = " ".join(buffer_desc).strip()
-                    buffer_desc = []  # clear
-
-                    fx_amt_val = clean_amount(fx_amt)
-                    fx_rate_val = clean_amount(fx_rate)
-                    aed_val = clean_amount(aed_amt)
-
-                    debit, credit = 0.0, 0.0
-                    if cr_flag or "cr" in raw.lower() or "payment" in full_desc.lower() or "refund" in full_desc.lower():
-                        credit = aed_val
-                    else:
-                        debit = aed_val
-
-                    transactions.append({
-                        "transaction_date": normalize_date(date, "%d/%m/%Y"),
-                        "description": full_desc,
-                        "debit": debit,
-                        "credit": credit,
-                        "amount": aed_val,
-                        "bank": BANK_NAME,
-                        "card_type": CARD_TYPE,
-                        # extra FX info (ignored in normalized output)
-                        "fx_currency": ccy,
-                        "fx_amount": fx_amt_val,
-                        "fx_rate": fx_rate_val,
-                    })
-                    continue
-
-                # ---------- Non-transaction line ----------
-                buffer_desc.append(raw)
-    normalized = normalize_transactions(transactions, BANK_NAME, CARD_TYPE)
+                    fd, td = m.groups()
+                    statement_from = normalize_date(fd.replace(" ", ""), "%d/%m/%Y")
+                    statement_to = normalize_date(td.replace(" ", ""), "%d/%m/%Y")
+                    meta.update(from_date=statement_from, to_date=statement_to)
+                continue
+
+            # --------- AED transaction ----------
+            m = RAKBANK_LINE_REGEX.match(raw)
+            if m:
+                date, desc, amt_raw, balance_raw = m.groups()
+                if any(h in " ".join(buffer_desc).lower() for h in DROP_HINTS):
+                    buffer_desc = []
+
+                full_desc = " ".join(buffer_desc + [desc.strip()]).strip()
+                buffer_desc = []  # clear
+
+                amt_val = clean_amount(amt_raw)
+                balance_val = clean_amount(balance_raw)
+
+                debit, credit = 0.0, 0.0
+                if "cr" in raw.lower() or "payment" in full_desc.lower() or "refund" in full_desc.lower():
+                    credit = amt_val
+                else:
+                    debit = amt_val
+
+                yield normalize_transaction({
+                    "transaction_date": dates.iso(date),
+                    "description": full_desc,
+                    "debit": debit,
+                    "credit": credit,
+                    "amount": amt_val,
+                    "balance": balance_val,
+                }, BANK_NAME, CARD_TYPE)
+                continue
+
+            # --------- FX transaction ----------
+            mfx = RAKBANK_FX_REGEX.match(raw)
+            if mfx:
+                date, ccy, fx_amt, fx_rate, aed_amt, cr_flag = mfx.groups()
+                if any(h in " ".join(buffer_desc).lower() for h in DROP_HINTS):
+                    buffer_desc = []
+
+                full_desc = " ".join(buffer_desc).strip()
+                buffer_desc = []  # clear
+
+                fx_amt_val = clean_amount(fx_amt)
+                fx_rate_val = clean_amount(fx_rate)
+                aed_val = clean_amount(aed_amt)
+
+                debit, credit = 0.0, 0.0
+                if cr_flag or "cr" in raw.lower() or "payment" in full_desc.lower() or "refund" in full_desc.lower():
+                    credit = aed_val
+                else:
+                    debit = aed_val
+
+                yield normalize_transaction({
+                    "transaction_date": dates.iso(date),
+                    "description": full_desc,
+                    "debit": debit,
+                    "credit": credit,
+                    "amount": aed_val,
+                    # extra FX info (ignored in normalized output)
+                    "fx_currency": ccy,
+                    "fx_amount": fx_amt_val,
+                    "fx_rate": fx_rate_val,
+                }, BANK_NAME, CARD_TYPE)
+                continue
+
+            # ---------- Non-transaction line ----------
+            buffer_desc.append(raw)
+
+
+def parse_rakbank(source, password: str | None = None):
+    doc = open_statement(source, password)
+    if isinstance(doc, dict) and "error" in doc:
+        return doc  # error dict
+
+    meta = {}
+    with doc:
+        transactions = TransactionBatch(BANK_NAME, CARD_TYPE).extend(iter_rakbank(doc, meta))
+
     return {
         "bank": BANK_NAME,
         "card_type": CARD_TYPE,
-        "summary": summarize_transactions(normalized),
-        "transactions": normalized,
-        "from_date": statement_from,
-        "to_date": statement_to,
-    }
\ No newline at end of file
+        "summary": summarize_transactions(transactions),
+        "transactions": transactions,
+        "from_date": meta["from_date"],
+        "to_date": meta["to_date"],
+    }
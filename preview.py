@@ -1,5 +1,12 @@
 # preview.py
-import pdfplumber
+import re
+
+from common.pdf_utils import as_pdf_source, iter_pages
+
+PREVIEW_MODES = ("text", "tables", "both")
+
+_RANGE_RE = re.compile(r"^(\d+)?\s*(-)?\s*(\d+)?$")
+
 
 def _split_cell(x):
     """Return both the raw cell and a split-by-newline version."""
@@ -7,32 +14,101 @@ def _split_cell(x):
     parts = [p.strip() for p in raw.split("\n") if p and p.strip()]
     return {"raw": raw, "split": parts}
 
-def preview_pdf(file_path: str, password: str | None = None):
+
+def parse_page_ranges(spec: str | None) -> list[tuple[int, int | None]] | None:
+    """
+    "1-3,7,10-" -> [(1, 3), (7, 7), (10, None)] (1-based, inclusive, None = last page).
+    None/empty means every page. Raises ValueError for malformed ranges.
+    """
+    if not spec or not spec.strip():
+        return None
+    ranges = []
+    for part in spec.split(","):
+        m = _RANGE_RE.match(part.strip())
+        if not m or not (m.group(1) or m.group(3)):
+            raise ValueError(f"Invalid page range: {part.strip()!r}. Use e.g. pages=1-3 or pages=2,5-")
+        first, dash, last = m.groups()
+        start = int(first) if first else 1
+        stop = (int(last) if last else None) if dash else start
+        if start < 1 or (stop is not None and stop < start):
+            raise ValueError(f"Invalid page range: {part.strip()!r}")
+        ranges.append((start, stop))
+    return ranges
+
+
+def check_mode(mode: str | None) -> str:
+    mode = (mode or "both").strip().lower()
+    if mode not in PREVIEW_MODES:
+        raise ValueError(f"Unknown mode: {mode}. Available: {', '.join(PREVIEW_MODES)}")
+    return mode
+
+
+def select_pages(ranges, page_count: int) -> list[int]:
+    """Sorted 0-based page indexes covered by `ranges`, clipped to the document."""
+    if ranges is None:
+        return list(range(page_count))
+    selected = set()
+    for start, stop in ranges:
+        selected.update(range(start - 1, min(page_count, stop or page_count)))
+    return sorted(selected)
+
+
+def _page_tables(page) -> list[dict]:
+    page_tables = []
+    for tidx, tbl in enumerate(page.extract_tables() or [], start=1):
+        norm_rows = []
+        for ridx, row in enumerate(tbl or [], start=1):
+            norm_row = [_split_cell(c) for c in (row or [])]
+            norm_rows.append({"row_index": ridx, "cells": norm_row})
+        page_tables.append({"table_index": tidx, "rows": norm_rows})
+    return page_tables
+
+
+def preview_pdf(file_path, password: str | None = None, pages=None, mode: str = "both"):
     """
     Generic PDF preview:
-    - Returns text lines per page
-    - Returns all tables per page, with raw and split cells
+    - Returns text lines and/or tables (raw and split cells) per page
+    - `pages` limits it to some pages (a "1-3" spec or parsed ranges), `mode`
+      to "text", "tables" or "both"
+    - Each page is laid out once for both and released before the next
     - No bank-specific logic
     """
-    result = {"text_by_page": [], "tables_by_page": []}
+    import pdfplumber  # deferred: keeps app start-up fast
+
+    with pdfplumber.open(as_pdf_source(file_path), password=password) as pdf:
+        return preview_pages(pdf, pages, mode)
+
 
-    with pdfplumber.open(file_path, password=password) as pdf:
-        # Text mode
-        for pidx, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
+def preview_pages(pdf, pages=None, mode: str = "both", texts: dict[int, str] | None = None):
+    """
+    preview_pdf for an already open pdfplumber PDF. `texts` maps 0-based page
+    indexes to full page text: pages found there are not extracted again and
+    the ones extracted here are added (see StatementDocument.full_texts).
+    """
+    if isinstance(pages, str):
+        pages = parse_page_ranges(pages)
+    mode = check_mode(mode)
+    want_text = mode in ("text", "both")
+    want_tables = mode in ("tables", "both")
+    if texts is None:
+        texts = {}
+
+    result = {"page_count": len(pdf.pages)}
+    if want_text:
+        result["text_by_page"] = []
+    if want_tables:
+        result["tables_by_page"] = []
+
+    # one page's layout alive at a time; text and tables share it
+    for index, page in iter_pages(pdf, select_pages(pages, len(pdf.pages))):
+        pidx = index + 1
+        if want_text:
+            text = texts.get(index)
+            if text is None:
+                text = texts[index] = page.extract_text() or ""
             lines = [{"i": i, "line": ln} for i, ln in enumerate(text.splitlines(), start=1)]
             result["text_by_page"].append({"page": pidx, "lines": lines})
-
-        # Table mode
-        for pidx, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables() or []
-            page_tables = []
-            for tidx, tbl in enumerate(tables, start=1):
-                norm_rows = []
-                for ridx, row in enumerate(tbl or [], start=1):
-                    norm_row = [_split_cell(c) for c in (row or [])]
-                    norm_rows.append({"row_index": ridx, "cells": norm_row})
-                page_tables.append({"table_index": tidx, "rows": norm_rows})
-            result["tables_by_page"].append({"page": pidx, "tables": page_tables})
+        if want_tables:
+            result["tables_by_page"].append({"page": pidx, "tables": _page_tables(page)})
 
     return result
@@ -0,0 +1,91 @@
+# reparse.py
+# Bulk re-import from page-text snapshots (common.snapshots): runs the bank
+# parsers over saved text, so a parser fix costs regex time, not PDF time.
+# Writes one NDJSON line per statement: {"sha256", "bank", "result"} or
+# {"sha256", "error"}.
+#
+#   python reparse.py --dir /data/snapshots > reimport.ndjson
+#   python reparse.py --detected rakbank --out rakbank.ndjson    # only statements detected as RAKBANK
+#   python reparse.py --sha256 3f1c... --bank mashreq           # one statement, forcing the parser
+import argparse
+import contextlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common.snapshots import SNAPSHOT_DIR, SnapshotStore, StaleSnapshot, load_snapshot
+from common.transactions import dumps
+
+
+def reparse_path(path: str, bank: str | None = None, detected: str | None = None) -> tuple[bytes, bool] | None:
+    """(NDJSON line, ok) for the snapshot at `path`; None when `detected` filters it out."""
+    from parsers import resolve
+    from tasks import parse_snapshot
+
+    try:
+        snapshot = load_snapshot(path)
+    except StaleSnapshot as e:
+        return _error({"path": path}, str(e))
+    if snapshot is None:
+        return _error({"path": path}, "Unreadable snapshot")
+    if detected and resolve(snapshot["detection"].get("bank")) != resolve(detected):
+        return None
+    try:
+        result = parse_snapshot(snapshot, bank)
+    except Exception as e:
+        return _error({"sha256": snapshot["sha256"]}, str(e))
+    if isinstance(result, dict) and "error" in result:
+        return _error({"sha256": snapshot["sha256"]}, result["error"])
+    return dumps({"sha256": snapshot["sha256"], "bank": result.get("bank"), "result": result}) + b"\n", True
+
+
+def _error(record: dict, message: str) -> tuple[bytes, bool]:
+    return dumps({**record, "error": message}) + b"\n", False
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Re-parse statements from saved page-text snapshots")
+    ap.add_argument("--dir", default=SNAPSHOT_DIR, help="snapshot directory (default: $SNAPSHOT_DIR)")
+    ap.add_argument("--sha256", nargs="*", default=None, help="only these documents (by PDF sha256)")
+    ap.add_argument("--password", default=None, help="password the --sha256 documents were parsed with")
+    ap.add_argument("--detected", default=None, help="only statements originally detected as this bank")
+    ap.add_argument("--bank", default=None, help="parse with this bank's parser instead of the detected one")
+    ap.add_argument("--out", default=None, help="write NDJSON here instead of stdout")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parser processes (1 = in-process)")
+    args = ap.parse_args(argv)
+
+    if not args.dir:
+        ap.error("no snapshot directory: pass --dir or set SNAPSHOT_DIR")
+    store = SnapshotStore(args.dir)
+    if args.sha256:
+        paths = [store.path(sha256.lower(), args.password) for sha256 in args.sha256]
+    else:
+        paths = list(store.paths())
+
+    started = time.perf_counter()
+    done = errors = 0
+    parallel = args.workers > 1 and len(paths) > 1
+    with (open(args.out, "wb") if args.out else contextlib.nullcontext(sys.stdout.buffer)) as out, \
+            (ProcessPoolExecutor(max_workers=args.workers) if parallel else contextlib.nullcontext()) as pool:
+        n = len(paths)
+        if parallel:
+            outcomes = pool.map(reparse_path, paths, [args.bank] * n, [args.detected] * n, chunksize=16)
+        else:
+            outcomes = (reparse_path(path, args.bank, args.detected) for path in paths)
+        for outcome in outcomes:
+            if outcome is None:
+                continue
+            line, ok = outcome
+            out.write(line)
+            done += 1
+            errors += not ok
+        out.flush()
+
+    elapsed = time.perf_counter() - started
+    print(f"{done} statements re-parsed ({errors} errors) in {elapsed:.2f}s", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
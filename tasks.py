@@ -0,0 +1,168 @@
+# tasks.py
+# Synchronous, picklable entry points dispatched to the parser pool.
+# `source` is a file path or the raw PDF bytes of an upload.
+from parsers import get_iterator, get_parser, registered
+from common.bank_detect import detect_bank_details
+from common.document import StatementDocument, open_statement
+from common.engines import engine_for
+from common.layouts import layout_for
+from common.metrics import note, stage, timed_call
+from common.snapshots import SnapshotStore
+from common.streaming import chunked, ndjson_error, ndjson_records, send
+from preview import preview_pages, preview_pdf
+
+# page text of parsed statements, for parse_snapshot (off unless SNAPSHOT_DIR is set)
+snapshots = SnapshotStore()
+
+
+def parse_statement(source, password: str | None = None, bank: str | None = None):
+    # open/decrypt once; detection and the parser share the memoized page text
+    doc = open_statement(source, password)
+    if isinstance(doc, dict) and "error" in doc:
+        return doc
+
+    with doc:
+        return _parse_open(doc, bank)
+
+
+def _parse_open(doc, bank: str | None):
+    detection = _detect(doc, bank)
+    result = _run_parser(doc, detection)
+    if isinstance(result, dict) and "error" not in result:
+        snapshots.record(doc, detection)
+    return result
+
+
+def open_session(source, password: str | None = None):
+    """Page count of a document about to become an upload session, or open_statement's error dict."""
+    doc = open_statement(source, password)
+    if isinstance(doc, dict) and "error" in doc:
+        return doc
+    with doc:
+        return {"page_count": doc.page_count}
+
+
+def parse_session(source, password: str | None, texts: dict[int, str], bank: str | None = None):
+    """
+    parse_statement for an upload session (common.sessions): `texts` is the
+    full page text extracted for it before. Returns ((result, worker timings),
+    new page texts).
+    """
+    (result, new_texts), timings = timed_call(_in_session, source, password, texts, _parse_open, bank)
+    return (result, timings), new_texts
+
+
+def preview_session(source, password: str | None, texts: dict[int, str], pages=None, mode: str = "both"):
+    """preview_statement for an upload session, as parse_session."""
+    return _in_session(source, password, texts, _preview_open, pages, mode)
+
+
+def _preview_open(doc, pages, mode):
+    return preview_pages(doc.pdf, pages, mode, doc.full_texts)
+
+
+def _in_session(source, password, texts, fn, *args):
+    doc = open_statement(source, password)
+    if isinstance(doc, dict) and "error" in doc:
+        return doc, {}
+    with doc:
+        doc.full_texts.update(texts)
+        result = fn(doc, *args)
+        return result, {i: t for i, t in doc.full_texts.items() if i not in texts}
+
+
+def parse_snapshot(snapshot: dict, bank: str | None = None):
+    """
+    parse_statement over a snapshot's page text (common.snapshots): only the
+    bank parser runs. The snapshot's detection is reused unless `bank`
+    overrides it; the text was extracted for the detected bank, though.
+    """
+    with StatementDocument.from_texts(snapshot["pages"]) as doc:
+        detection = _detect(doc, bank) if bank else snapshot["detection"]
+        return _run_parser(doc, detection)
+
+
+def reparse_snapshot(sha256: str, password: str | None = None, bank: str | None = None):
+    """parse_snapshot by document hash; None when there is no snapshot of it."""
+    snapshot = snapshots.load(sha256, password)
+    if snapshot is None:
+        return None
+    return parse_snapshot(snapshot, bank)
+
+
+def _run_parser(doc, detection: dict):
+    bank_guess = detection["bank"] or "unknown"
+    # a registry key for the metric label, never a client's raw override
+    note("bank", registered(bank_guess) or "unknown")
+    _prepare(doc, bank_guess)
+    parser = get_parser(bank_guess)
+    with stage("parse"):
+        result = parser(doc)
+    if isinstance(result, dict) and "error" not in result:
+        result["detection"] = detection
+    return result
+
+
+def _prepare(doc, bank_guess: str):
+    # set both, even when the bank wants neither: an upload session's
+    # document may still have another bank's engine or crop from before
+    doc.use_engine(engine_for(bank_guess))
+    doc.use_layout(layout_for(bank_guess))
+
+
+def _detect(doc, bank: str | None) -> dict:
+    if bank:
+        return {"bank": bank, "confidence": 1.0, "method": "override"}
+    return detect_bank_details(doc)
+
+
+def stream_statement(doc, bank: str | None = None, fields: tuple[str, ...] | None = None):
+    """
+    Yield NDJSON lines for an already opened StatementDocument as the parser
+    produces them. Failures, detection included, end the stream with an
+    error record.
+    """
+    with doc:
+        try:
+            detection = _detect(doc, bank)
+            bank_guess = detection["bank"] or "unknown"
+            _prepare(doc, bank_guess)
+            meta = {}
+            transactions = get_iterator(bank_guess)(doc, meta)
+            meta["detection"] = detection
+        except Exception as e:
+            yield ndjson_error(str(e))
+            return
+        yield from ndjson_records(transactions, meta, fields)
+        snapshots.record(doc, detection)
+
+
+def stream_statement_to(channel, cancel, source, password: str | None = None, bank: str | None = None,
+                        fields: tuple[str, ...] | None = None):
+    """
+    stream_statement on a pool worker (common.executor.stream_job): the
+    NDJSON goes back over `channel` in chunks while the parse runs. The first
+    item is b"" once the document is open, or open_statement's error dict;
+    None ends the stream. Stops early once `cancel` is set.
+    """
+    doc = open_statement(source, password)
+    if isinstance(doc, dict) and "error" in doc:
+        send(channel, cancel, doc)
+        send(channel, cancel, None)
+        return
+    with doc:
+        if not send(channel, cancel, b""):
+            return
+        lines = stream_statement(doc, bank, fields)
+        try:
+            for chunk in chunked(lines):
+                if not send(channel, cancel, chunk):
+                    return
+        finally:
+            lines.close()
+    send(channel, cancel, None)
+
+
+def preview_statement(source, password: str | None = None, pages=None, mode: str = "both"):
+    return preview_pdf(source, password, pages, mode)
+